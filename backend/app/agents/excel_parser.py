@@ -1,197 +1,774 @@
 """
 AI-powered Excel parsing agent using Google Gemini.
 LLM handles: header detection, fuzzy column→parameter mapping, asset detection.
-Deterministic code handles: value parsing, validation, file I/O.
+Deterministic code handles: value parsing, validation, file I/O, and any header the
+local matcher can resolve with high confidence before the LLM is asked.
 """
+import hashlib
 import json
 import logging
+import math
 import os
 import re
-from io import BytesIO
-
-import google.generativeai as genai
-import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from operator import itemgetter
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
 
 from app.models.schemas import (
+    CellBatchRecord,
+    ColumnarParseResponse,
+    ColumnBatchRecord,
     ColumnMapping,
+    IncrementalParseResponse,
     LLMMappingResponse,
+    LLMUsage,
     ParsedCell,
+    ParsedColumn,
+    ParseRecord,
     ParseResponse,
+    SheetDelta,
+    SheetMappingRecord,
+    SummaryRecord,
     UnmappedColumn,
+    WarningRecord,
+)
+from app.utils.header_matcher import LOCAL_MATCHER_ENABLED, get_header_matcher
+from app.utils.ingest_state import IngestSession, SheetState, get_ingest_store
+from app.utils.llm_client import MODEL, get_llm_client
+from app.utils.mapping_cache import get_mapping_cache, normalize_header
+from app.utils.parse_cache import cache_key, get_parse_cache, workbook_digest
+from app.utils.parse_pool import (
+    PARALLEL_PARSE_MIN_ROWS,
+    PARALLEL_PARSE_WORKERS,
+    copy_workbook,
+    get_parse_pool,
+    shutdown_parse_pool,
 )
-from app.utils.registry import load_assets, load_parameters
-from app.utils.value_parser import parse_value, validate_value
+from app.utils.prompts import build_mapping_prompt, usage_from_response
+from app.utils.value_parser import flag_values, parse_profiled, parse_value, profile_column, validate_value
+from app.utils.workbook_readers import WorkbookReader, open_workbook, reader_identity
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+MAPPING_CONCURRENCY = int(os.getenv("MAPPING_CONCURRENCY", "4"))
+MAPPING_BATCH_SIZE = int(os.getenv("MAPPING_BATCH_SIZE", "80"))
+PARSE_CHUNK_ROWS = int(os.getenv("PARSE_CHUNK_ROWS", "2048"))
+PROFILE_SAMPLE_ROWS = 256  # cells of each mapped column classified before its first chunk is parsed
+LLM_UNAVAILABLE = "LLM unavailable"
 
 
-def _build_mapping_prompt(headers: list[str], sheet_name: str = "Sheet1") -> str:
-    parameters = load_parameters()
-    assets = load_assets()
-
-    param_summary = json.dumps(
-        [{"name": p["name"], "display_name": p["display_name"], "unit": p["unit"]} for p in parameters],
-        indent=2,
-    )
-    asset_summary = json.dumps(
-        [{"name": a["name"], "display_name": a["display_name"], "type": a["type"]} for a in assets],
-        indent=2,
-    )
-
-    return f"""You are an expert industrial data analyst for an ESG platform called LatSpace.
-
-Your job is to map Excel column headers from a factory data spreadsheet to our canonical parameter registry.
-
-## Parameter Registry
-{param_summary}
-
-## Asset Registry
-{asset_summary}
-
-## Task
-The Excel sheet "{sheet_name}" has these column headers (with their column index):
-{json.dumps({str(i): h for i, h in enumerate(headers)}, indent=2)}
-
-For EACH header, determine:
-1. Which parameter from the registry it maps to (or null if unmapped)
-2. Which asset it refers to (or null if none/plant-level)
-3. Confidence level: "high" (exact/near-exact), "medium" (reasonable guess), "low" (unclear)
-4. Brief reasoning
-
-Rules:
-- Be aggressive about fuzzy matching: "Coal Used (MT)" → coal_consumption, "COAL CONSMPTN" → coal_consumption
-- Detect embedded asset names: "Coal Consumption AFBC-1" → param=coal_consumption, asset=AFBC-1
-- "Steam (Boiler 2)" → param=steam_generation, asset=AFBC-2 (Boiler 2 = AFBC-2)
-- "Power TG1" → param=power_generation, asset=TG-1
-- Generic columns like "Date", "Day", "Comments", "Sr No" → unmapped (null param)
-- Return the header_row_index (0-based index of the row that contains headers, usually 0 unless there are title rows)
-
-## Output Format
-Return ONLY valid JSON matching this exact schema. No markdown, no explanation:
-{{
-  "header_row_index": 0,
-  "mappings": [
-    {{
-      "col_index": 0,
-      "original_header": "Coal Consumption AFBC-1",
-      "param_name": "coal_consumption",
-      "asset_name": "AFBC-1",
-      "confidence": "high",
-      "reasoning": "Exact parameter name with explicit asset suffix"
-    }}
-  ],
-  "unmapped_headers": ["Comments", "Sr No"],
-  "notes": "Any overall observations about the file structure"
-}}"""
+def _is_label(cell: object, typed: bool) -> bool:
+    """A non-empty string that reads as text; in text formats (typed=False) numbers arrive as strings too."""
+    return isinstance(cell, str) and bool(cell.strip()) and (typed or parse_value(cell) is None)
 
 
 def _extract_headers_and_data(
-    ws: Worksheet, max_scan_rows: int = 10
-) -> tuple[int, list[str], list[list]]:
+    rows: Iterator[tuple], max_scan_rows: int = 10, typed: bool = True
+) -> tuple[int, list[str], Iterator[tuple]]:
     """
     Scan first max_scan_rows to find the header row.
-    Returns (header_row_idx, headers, all_data_rows).
+    Returns (header_row_idx, headers, data_rows) where data_rows is a lazy iterator,
+    so only the scanned rows are ever held in memory at once.
     Uses a heuristic: the header row has the most non-empty string cells.
     """
-    all_rows = list(ws.iter_rows(values_only=True))
-    if not all_rows:
-        return 0, [], []
+    rows = iter(rows)
+    scanned = list(islice(rows, max_scan_rows))
+    if not scanned:
+        return 0, [], iter(())
 
     best_row_idx = 0
     best_score = -1
 
-    for i, row in enumerate(all_rows[:max_scan_rows]):
-        score = sum(1 for cell in row if cell is not None and isinstance(cell, str) and cell.strip())
+    for i, row in enumerate(scanned):
+        score = sum(1 for cell in row if _is_label(cell, typed))
         if score > best_score:
             best_score = score
             best_row_idx = i
 
-    headers = [str(c).strip() if c is not None else "" for c in all_rows[best_row_idx]]
-    data_rows = all_rows[best_row_idx + 1 :]
+    headers = [str(c).strip() if c is not None else "" for c in scanned[best_row_idx]]
+    data_rows = chain(scanned[best_row_idx + 1 :], rows)
     return best_row_idx, headers, data_rows
 
 
+def _request_mapping(headers: list[str], sheet_name: str) -> LLMMappingResponse:
+    """Single LLM call to map all headers at once. Raises on any failure."""
+    prompt = build_mapping_prompt(headers, sheet_name)
+    # low temperature for deterministic mapping
+    response = get_llm_client().generate(prompt, temperature=0.1)
+    raw = response.text.strip()
+    # Strip markdown code fences if present
+    raw = re.sub(r"^```(?:json)?\s*", "", raw)
+    raw = re.sub(r"\s*```$", "", raw)
+    data = json.loads(raw)
+    # The prompt doesn't ask the model to echo headers back; fill them in from the column index
+    for m in data.get("mappings", []):
+        if "original_header" not in m and isinstance(m.get("col_index"), int) and 0 <= m["col_index"] < len(headers):
+            m["original_header"] = headers[m["col_index"]]
+    usage = usage_from_response(response, prompt)
+    logger.info(
+        f"Mapping call for {len(headers)} headers: {usage.input_tokens} input / {usage.output_tokens} output tokens, "
+        f"~${usage.estimated_cost_usd:.6f}"
+    )
+    return LLMMappingResponse(**data, usage=usage)
+
+
 def _call_gemini_for_mapping(headers: list[str], sheet_name: str) -> LLMMappingResponse:
-    """Single LLM call to map all headers at once."""
-    prompt = _build_mapping_prompt(headers, sheet_name)
-    model = genai.GenerativeModel(MODEL)
+    """Map all headers at once, served from the mapping cache when the same headers were seen before."""
+    cache = get_mapping_cache()
+    cached = cache.get(headers, MODEL)
+    if cached is not None:
+        logger.info(f"Mapping cache hit for sheet '{sheet_name}'")
+        return cached
 
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1,  # low temperature for deterministic mapping
-                response_mime_type="application/json",
-            ),
-        )
-        raw = response.text.strip()
-        # Strip markdown code fences if present
-        raw = re.sub(r"^```(?:json)?\s*", "", raw)
-        raw = re.sub(r"\s*```$", "", raw)
-        data = json.loads(raw)
-        return LLMMappingResponse(**data)
+        result = _request_mapping(headers, sheet_name)
     except Exception as e:
         logger.error(f"Gemini mapping call failed: {e}")
-        # Fallback: return empty mappings
+        # Fallback: return empty mappings (never cached, so the next upload retries the LLM)
         return LLMMappingResponse(
             header_row_index=0,
             mappings=[
-                ColumnMapping(col_index=i, original_header=h, confidence="low", reasoning="LLM unavailable")
+                ColumnMapping(col_index=i, original_header=h, confidence="low", reasoning=LLM_UNAVAILABLE)
                 for i, h in enumerate(headers)
             ],
         )
 
+    cache.put(headers, MODEL, result.model_copy(update={"usage": None}))
+    return result
+
+
+@dataclass
+class _HeaderGroup:
+    """Sheets whose normalized header rows are identical share one mapping."""
+
+    headers: list[str]
+    sheets: list[str] = field(default_factory=list)
+    resolved: list[ColumnMapping] = field(default_factory=list)
+    leftover: list[int] = field(default_factory=list)
+    batches: set[int] = field(default_factory=set)
+
+
+def _group_by_signature(sheet_headers: dict[str, list[str]]) -> list[_HeaderGroup]:
+    groups: dict[tuple[str, ...], _HeaderGroup] = {}
+    for sheet_name, headers in sheet_headers.items():
+        signature = tuple(normalize_header(h) for h in headers)
+        group = groups.setdefault(signature, _HeaderGroup(headers=headers))
+        group.sheets.append(sheet_name)
+
+    matcher = get_header_matcher() if LOCAL_MATCHER_ENABLED else None
+    for group in groups.values():
+        if matcher is None:
+            group.leftover = list(range(len(group.headers)))
+        else:
+            group.resolved, group.leftover = matcher.match_headers(group.headers)
+    return list(groups.values())
+
+
+def _sheet_mapping(
+    group: _HeaderGroup, headers: list[str], llm_by_header: dict[str, ColumnMapping], header_row_idx: int
+) -> LLMMappingResponse:
+    """Fan the workbook-level LLM answers back out to one sheet's column indexes."""
+    mappings = [m.model_copy(update={"original_header": headers[m.col_index]}) for m in group.resolved]
+    for col in group.leftover:
+        llm_mapping = llm_by_header.get(normalize_header(headers[col]))
+        if llm_mapping is not None:
+            mappings.append(llm_mapping.model_copy(update={"col_index": col, "original_header": headers[col]}))
+    mappings.sort(key=lambda m: m.col_index)
+    return LLMMappingResponse(
+        header_row_index=header_row_idx,
+        mappings=mappings,
+        unmapped_headers=[m.original_header for m in mappings if m.param_name is None],
+    )
+
+
+@dataclass
+class _SheetResult:
+    """Everything one sheet contributes to the response, merged in workbook order at the end."""
 
-def parse_excel(file_bytes: bytes, filename: str) -> ParseResponse:
+    parsed: list[ParsedCell] = field(default_factory=list)
+    columns: dict[int, ParsedColumn] = field(default_factory=dict)
+    unmapped: list[UnmappedColumn] = field(default_factory=list)
+    warnings: list[str] = field(default_factory=list)
+
+    def add_columns(self, batch: list[ParsedColumn]) -> None:
+        for column in batch:
+            existing = self.columns.get(column.col)
+            if existing is None:
+                self.columns[column.col] = column
+            else:
+                existing.rows.extend(column.rows)
+                existing.values.extend(column.values)
+
+
+def parse_excel(
+    source: bytes | BinaryIO, filename: str, max_concurrency: int = MAPPING_CONCURRENCY, columnar: bool = False
+) -> ParseResponse | ColumnarParseResponse:
     """
     Main entry point: parse an Excel file and return structured data.
     Supports multi-sheet workbooks.
+
+    The workbook is opened in read-only mode and rows are streamed sheet by sheet,
+    so memory use does not grow with the length of a sheet. Sheets that repeat a header
+    row share one mapping, and all distinct unresolved headers in the workbook go to the
+    LLM in one combined request. Very wide workbooks are split into batches that run
+    concurrently (at most max_concurrency in flight); each sheet is parsed as soon as
+    the batches covering its headers are ready.
+
+    With columnar=True the result is a ColumnarParseResponse: one entry per mapped
+    column carrying its metadata once, followed by row numbers and parsed values.
+
+    Results are cached by workbook content, and identical parses running at the same
+    time share one computation. A parse that fell back because the LLM was unavailable
+    is never cached.
     """
-    wb = openpyxl.load_workbook(BytesIO(file_bytes), data_only=True)
-    all_parsed: list[ParsedCell] = []
-    all_unmapped: list[UnmappedColumn] = []
-    all_warnings: list[str] = []
-    all_duplicates: list[str] = []
-    final_header_row = 0
-    seen_param_asset: dict[str, int] = {}  # duplicate detection
+    key = parse_cache_key(source, filename, columnar)
+    return get_parse_cache().get_or_compute(
+        key,
+        lambda: collect_records(iter_parse_excel(source, filename, max_concurrency, columnar), columnar),
+        cacheable=lambda result: all(u.reason != LLM_UNAVAILABLE for u in result.unmapped_columns),
+    )
+
+
+def parse_cache_key(source: bytes | BinaryIO, filename: str, columnar: bool) -> str:
+    """Key of parse_excel's result for this workbook in the parse cache; a file is read and rewound."""
+    return cache_key(workbook_digest(source), MODEL, columnar, reader_identity(filename))
+
+
+def ingest_excel(
+    source: bytes | BinaryIO,
+    filename: str,
+    workbook_key: str,
+    max_concurrency: int = MAPPING_CONCURRENCY,
+    columnar: bool = False,
+) -> IncrementalParseResponse:
+    """
+    Incremental parse for workbooks that grow by appended rows and are re-uploaded whole.
+
+    workbook_key identifies the workbook across uploads. Sheets whose bytes are unchanged
+    are skipped without being read; sheets with the same header row reuse the stored
+    mapping (no LLM call) and only rows past the stored watermark are parsed. If a row
+    below the watermark was edited the sheet is parsed again from the top, and a sheet
+    whose header row changed is treated as new. State is saved only after a complete parse.
+    """
+    store = get_ingest_store()
+    with store.lock(workbook_key):
+        session = store.session(workbook_key)
+        result = collect_records(iter_parse_excel(source, filename, max_concurrency, columnar, session), columnar)
+        store.commit(session)
+    return IncrementalParseResponse(workbook_key=workbook_key, sheets=session.deltas, result=result)
+
+
+def collect_records(records: Iterable[ParseRecord], columnar: bool = False) -> ParseResponse | ColumnarParseResponse:
+    """Assemble the records of iter_parse_excel into a single response, in workbook order."""
+    results: dict[str, _SheetResult] = {}
+    summary: SummaryRecord | None = None
+
+    for record in records:
+        if isinstance(record, SummaryRecord):
+            summary = record
+            continue
+        result = results.setdefault(record.sheet, _SheetResult())
+        if isinstance(record, SheetMappingRecord):
+            result.unmapped.extend(record.unmapped_columns)
+        elif isinstance(record, CellBatchRecord):
+            result.parsed.extend(record.cells)
+        elif isinstance(record, ColumnBatchRecord):
+            result.add_columns(record.columns)
+        elif isinstance(record, WarningRecord):
+            result.warnings.extend(record.warnings)
+
+    ordered = [results[name] for name in summary.sheets if name in results]
+    all_unmapped = [u for r in ordered for u in r.unmapped]
+    all_warnings = [w for r in ordered for w in r.warnings]
+
+    if columnar:
+        # Values were produced by parse_column, so skip re-validating every element
+        return ColumnarParseResponse.model_construct(
+            status=summary.status,
+            header_row=summary.header_row,
+            columns=[c for r in ordered for c in r.columns.values()],
+            unmapped_columns=all_unmapped,
+            warnings=all_warnings,
+            duplicate_flags=summary.duplicate_flags,
+            llm_usage=summary.llm_usage,
+        )
+
+    return ParseResponse(
+        status=summary.status,
+        header_row=summary.header_row,
+        parsed_data=[c for r in ordered for c in r.parsed],
+        unmapped_columns=all_unmapped,
+        warnings=all_warnings,
+        duplicate_flags=summary.duplicate_flags,
+        llm_usage=summary.llm_usage,
+    )
+
+
+def iter_parse_excel(
+    source: bytes | BinaryIO,
+    filename: str,
+    max_concurrency: int = MAPPING_CONCURRENCY,
+    columnar: bool = False,
+    session: IngestSession | None = None,
+) -> Iterator[ParseRecord]:
+    """
+    Parse an Excel file as a stream of records, produced as soon as each piece is ready.
+    A sheet's SheetMappingRecord precedes its cell (or column) batches and warnings;
+    records of different sheets may interleave, and one SummaryRecord comes last.
+
+    source is the workbook bytes or a seekable binary file (e.g. a spooled upload);
+    a file is read in place and left open for the caller to close. The reader is picked
+    by the filename's extension (.xlsx, .csv/.tsv, .xls, .ods; see workbook_readers).
+
+    With an ingest session, sheets unchanged since the session's previous upload produce
+    no records, and sheets whose header row is unchanged reuse the stored mapping and
+    yield only rows past the stored watermark (see ingest_excel).
+
+    Workbooks with at least PARALLEL_PARSE_MIN_ROWS data rows are parsed in the parse
+    pool: whole sheets, and row ranges of long ones, each on its own core. Records come
+    back in the order the serial parse produces them. Ingestion always parses in-process.
+    """
+    pool = get_parse_pool() if session is None else None
+    sheet_pool = _SheetPool(pool, source, filename) if pool is not None else None
+    wb = open_workbook(source, filename)
+    try:
+        yield from _iter_workbook(wb, max_concurrency, columnar, session, sheet_pool)
+    finally:
+        wb.close()
+        if sheet_pool is not None:
+            sheet_pool.close()
+
+
+def _iter_sheet_rows(
+    sheet_name: str,
+    mapping_result: LLMMappingResponse,
+    header_row_idx: int,
+    data_rows: Iterator[tuple],
+    columnar: bool,
+    row_offset: int = 0,
+) -> Iterator[ParseRecord]:
+    """row_offset is the number of data rows already consumed from data_rows' sheet."""
+    # Build lookup: col_index → ColumnMapping
+    col_map: dict[int, ColumnMapping] = {m.col_index: m for m in mapping_result.mappings}
+
+    # Track unmapped columns
+    yield SheetMappingRecord(
+        sheet=sheet_name,
+        header_row=header_row_idx,
+        mappings=mapping_result.mappings,
+        unmapped_columns=[
+            UnmappedColumn(
+                col=mapping.col_index,
+                header=mapping.original_header,
+                reason=mapping.reasoning or "No matching parameter found",
+            )
+            for mapping in mapping_result.mappings
+            if mapping.param_name is None
+        ],
+    )
+
+    mapped = sorted((col, m) for col, m in col_map.items() if m.param_name is not None and col >= 0)
+    if not mapped:
+        return
+    max_col = mapped[-1][0]
+
+    # Parse data rows in chunks: each mapped column of a chunk is parsed at once, through the
+    # fast path for its profile (taken from a sample of the column's first chunk)
+    first_row_num = header_row_idx + 1 + 2  # 1-indexed for display
+    profiles: dict[int, str] = {}
+    while chunk := list(islice(data_rows, PARSE_CHUNK_ROWS)):
+        chunk_start = first_row_num + row_offset
+        ragged = min(map(len, chunk)) <= max_col
+        columns = []
+        chunk_warnings: list[tuple[int, int, str]] = []
+
+        for pos, (col_idx, mapping) in enumerate(mapped):
+            if ragged:
+                cells = [row[col_idx] if col_idx < len(row) else None for row in chunk]
+                present = [col_idx < len(row) for row in chunk]
+            else:
+                cells = list(map(itemgetter(col_idx), chunk))
+                present = None
+            if col_idx not in profiles:
+                profiles[col_idx] = profile_column(cells[:PROFILE_SAMPLE_ROWS])
+            values, nulls = parse_profiled(cells, profiles[col_idx])
+            parsed = values.tolist()
+            for i in np.flatnonzero(nulls).tolist():
+                parsed[i] = None
+            columns.append((col_idx, mapping, cells, parsed, nulls, present))
+
+            # Validation warnings, re-ordered below to the row-by-row order of the cell layout.
+            # Only flagged values go through validate_value, for its messages.
+            for i in flag_values(mapping.param_name, values, nulls).tolist():
+                if present is not None and not present[i]:
+                    continue
+                for w in validate_value(mapping.param_name, parsed[i]):
+                    chunk_warnings.append((i, pos, f"Row {chunk_start + i}, col {col_idx}: {w}"))
+
+        if columnar:
+            batch = []
+            for col_idx, mapping, _, parsed, _, present in columns:
+                if present is None:
+                    rows, kept = list(range(chunk_start, chunk_start + len(chunk))), parsed
+                else:
+                    rows = [chunk_start + i for i, ok in enumerate(present) if ok]
+                    kept = [v for v, ok in zip(parsed, present) if ok]
+                batch.append(
+                    ParsedColumn.model_construct(
+                        sheet=sheet_name,
+                        col=col_idx,
+                        param_name=mapping.param_name,
+                        asset_name=mapping.asset_name,
+                        confidence=mapping.confidence,
+                        rows=rows,
+                        values=kept,
+                    )
+                )
+            yield ColumnBatchRecord.model_construct(sheet=sheet_name, columns=batch)
+        else:
+            # A column without nulls has no None cells, so str() can run over it in one pass
+            cell_columns = [
+                (col_idx, mapping, list(map(str, cells)) if not nulls.any() else
+                 [str(c) if c is not None else "" for c in cells], parsed)
+                for col_idx, mapping, cells, parsed, nulls, _ in columns
+            ]
+            batch = []
+            for i, row in enumerate(chunk):
+                actual_row_num = chunk_start + i
+                row_len = len(row)
+
+                for col_idx, mapping, raws, parsed in cell_columns:
+                    if col_idx >= row_len:
+                        continue
+                    batch.append(
+                        ParsedCell(
+                            row=actual_row_num,
+                            col=col_idx,
+                            param_name=mapping.param_name,
+                            asset_name=mapping.asset_name,
+                            raw_value=raws[i],
+                            parsed_value=parsed[i],
+                            confidence=mapping.confidence,
+                        )
+                    )
+            yield CellBatchRecord.model_construct(sheet=sheet_name, cells=batch)
+
+        if chunk_warnings:
+            chunk_warnings.sort(key=lambda w: (w[0], w[1]))
+            yield WarningRecord(sheet=sheet_name, warnings=[w for _, _, w in chunk_warnings])
+        row_offset += len(chunk)
+
+
+def _parse_sheet_part(
+    path: Path,
+    filename: str,
+    sheet_name: str,
+    mapping: LLMMappingResponse,
+    header_row_idx: int,
+    start: int,
+    stop: int | None,
+    columnar: bool,
+) -> list[ParseRecord]:
+    """
+    Parse-pool entry point: the records for data rows start..stop of one sheet. Only the
+    part starting at row 0 carries the sheet's SheetMappingRecord.
+    """
+    with open(path, "rb") as source:
+        wb = open_workbook(source, filename)
+        try:
+            data_rows = _extract_headers_and_data(wb.rows(sheet_name), typed=wb.typed)[2]
+            records = list(
+                _iter_sheet_rows(sheet_name, mapping, header_row_idx, islice(data_rows, start, stop), columnar, start)
+            )
+        finally:
+            wb.close()
+    return records if start == 0 else records[1:]
 
+
+class _SheetPool:
+    """
+    Hands mapped sheets to the parse pool, split into row ranges of part_rows (a multiple
+    of PARSE_CHUNK_ROWS, so batches match the serial parse). Workers read a temporary copy
+    of the workbook, written on the first submission. At most two parts per worker are
+    queued or finished but not yet consumed, so a slow reader doesn't pile up results.
+    """
+
+    def __init__(self, pool: ProcessPoolExecutor, source: bytes | BinaryIO, filename: str):
+        self.pool = pool
+        self.part_rows = PARSE_CHUNK_ROWS
+        self.window = 2 * PARALLEL_PARSE_WORKERS
+        self._source = source
+        self._start = 0 if isinstance(source, bytes) else source.tell()
+        self._filename = filename
+        self._path: Path | None = None
+        self._futures: set[Future] = set()
+
+    def plan(self, total_rows: int) -> None:
+        """Size the row ranges so the workbook's rows spread evenly over the workers."""
+        per_worker = math.ceil(total_rows / PARALLEL_PARSE_WORKERS)
+        self.part_rows = max(1, math.ceil(per_worker / PARSE_CHUNK_ROWS)) * PARSE_CHUNK_ROWS
+
+    def parts(self, sheet_name: str, mapping: LLMMappingResponse, header_row_idx: int, rows: int) -> list[tuple]:
+        """rows is the sheet's estimated data row count; the last range runs to the end whatever it is."""
+        count = max(1, math.ceil(rows / self.part_rows))
+        return [
+            (sheet_name, mapping, header_row_idx, i * self.part_rows, (i + 1) * self.part_rows if i < count - 1 else None)
+            for i in range(count)
+        ]
+
+    def results(self, parts: list[tuple], columnar: bool) -> Iterator[list[ParseRecord]]:
+        """Each part's records, in the order given."""
+        if self._path is None:
+            self._path = copy_workbook(self._source, self._start, Path(self._filename or "").suffix)
+        queued = iter(parts)
+        pending: deque[Future] = deque()
+
+        def submit_next() -> None:
+            part = next(queued, None)
+            if part is not None:
+                future = self.pool.submit(_parse_sheet_part, self._path, self._filename, *part, columnar)
+                self._futures.add(future)
+                pending.append(future)
+
+        for _ in range(self.window):
+            submit_next()
+        while pending:
+            future = pending.popleft()
+            try:
+                records = future.result()
+            except BrokenProcessPool:
+                shutdown_parse_pool()
+                raise
+            self._futures.discard(future)
+            submit_next()
+            yield records
+
+    def close(self) -> None:
+        for future in self._futures:
+            future.cancel()
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+
+
+def _header_signature(headers: list[str]) -> str:
+    return hashlib.sha256(json.dumps([normalize_header(h) for h in headers]).encode()).hexdigest()
+
+
+class _RowDigest:
+    """Counts and hashes data rows as they stream past, up to the last non-empty one."""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._snapshot = self._hash.copy()
+        self._seen = 0
+        self.count = 0
+
+    def feed(self, rows: Iterator[tuple]) -> Iterator[tuple]:
+        for row in rows:
+            self._seen += 1
+            self._hash.update(repr(row).encode() + b"\n")
+            # Trailing blank rows are not part of the watermark: they are where new rows will go
+            if any(v is not None for v in row):
+                self.count = self._seen
+                self._snapshot = self._hash.copy()
+            yield row
+
+    def hexdigest(self) -> str:
+        return self._snapshot.hexdigest()
+
+
+def _iter_ingested_sheet(
+    session: IngestSession,
+    wb: WorkbookReader,
+    sheet_name: str,
+    mapping: LLMMappingResponse,
+    header_row_idx: int,
+    signature: str,
+    data_rows: Iterator[tuple],
+    previous: SheetState | None,
+    content_hash: str | None,
+    columnar: bool,
+) -> Iterator[ParseRecord]:
+    """Parse a sheet under an ingest session: all of it when new, else rows past the watermark."""
+    digest = _RowDigest()
+    rows = digest.feed(data_rows)
+    status, offset = "new", 0
+    if previous is not None:
+        consumed = sum(1 for _ in islice(rows, previous.rows))
+        status, offset = "appended", previous.rows
+        if consumed != previous.rows or digest.hexdigest() != previous.rows_hash:
+            # A row below the watermark was edited: parse the sheet again, still with the stored mapping
+            digest = _RowDigest()
+            rows = digest.feed(_extract_headers_and_data(wb.rows(sheet_name), typed=wb.typed)[2])
+            status, offset = "reparsed", 0
+
+    yield from _iter_sheet_rows(sheet_name, mapping, header_row_idx, rows, columnar, offset)
+
+    new_rows = max(0, digest.count - offset)
+    if status == "appended" and new_rows == 0:
+        status = "unchanged"
+    fell_back = any(m.reasoning == LLM_UNAVAILABLE for m in mapping.mappings)
+    state = None if fell_back else SheetState(
+        signature, header_row_idx, mapping, digest.count, digest.hexdigest(), content_hash
+    )
+    session.record(
+        sheet_name,
+        state,
+        SheetDelta(
+            sheet=sheet_name,
+            status=status,
+            first_row=header_row_idx + 3 + offset if new_rows else None,
+            new_rows=new_rows,
+        ),
+    )
+
+
+def _iter_workbook(
+    wb: WorkbookReader,
+    max_concurrency: int,
+    columnar: bool,
+    session: IngestSession | None = None,
+    sheet_pool: _SheetPool | None = None,
+) -> Iterator[ParseRecord]:
+    streams: dict[str, tuple[int, list[str], Iterator[tuple]]] = {}
+    known: dict[str, tuple[int, Iterator[tuple], SheetState]] = {}  # header row unchanged since the last upload
+    content_hashes: dict[str, str | None] = {}
+    sheet_mappings: dict[str, LLMMappingResponse] = {}
+
+    # Detect headers everywhere first so the whole workbook can be mapped in one request
     for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        header_row_idx, headers, data_rows = _extract_headers_and_data(ws)
+        previous = session.previous.get(sheet_name) if session is not None else None
+        if session is not None:
+            content_hashes[sheet_name] = wb.content_hash(sheet_name)
+            if previous is not None and previous.content_hash and previous.content_hash == content_hashes[sheet_name]:
+                sheet_mappings[sheet_name] = previous.mapping
+                session.record(sheet_name, previous, SheetDelta(sheet=sheet_name, status="unchanged"))
+                continue
+
+        header_row_idx, headers, data_rows = _extract_headers_and_data(wb.rows(sheet_name), typed=wb.typed)
 
         if not headers or all(h == "" for h in headers):
-            all_warnings.append(f"Sheet '{sheet_name}': No headers found, skipped.")
+            yield WarningRecord(sheet=sheet_name, warnings=[f"Sheet '{sheet_name}': No headers found, skipped."])
+            continue
+
+        if (
+            previous is not None
+            and previous.header_row == header_row_idx
+            and previous.signature == _header_signature(headers)
+        ):
+            known[sheet_name] = (header_row_idx, data_rows, previous)
             continue
 
         if header_row_idx > 0:
-            all_warnings.append(
-                f"Sheet '{sheet_name}': Rows 0–{header_row_idx - 1} appear to be title/metadata rows, skipped."
+            yield WarningRecord(
+                sheet=sheet_name,
+                warnings=[f"Sheet '{sheet_name}': Rows 0–{header_row_idx - 1} appear to be title/metadata rows, skipped."],
             )
+        streams[sheet_name] = (header_row_idx, headers, data_rows)
+
+    data_row_counts: dict[str, int] = {}
+    if sheet_pool is not None:
+        # Row counts come from the file, or an estimate: a sheet's last range runs to its end regardless
+        for name, (header_row_idx, _, _) in streams.items():
+            data_row_counts[name] = max(0, (wb.row_count(name) or 0) - header_row_idx - 1)
+        total_rows = sum(data_row_counts.values())
+        if total_rows >= PARALLEL_PARSE_MIN_ROWS:
+            sheet_pool.plan(total_rows)
+        else:
+            sheet_pool = None
+
+    # Sheets with the same header signature share a mapping, and every distinct header the
+    # local matcher left over goes into a single combined request (split only past MAPPING_BATCH_SIZE)
+    groups = _group_by_signature({name: headers for name, (_, headers, _) in streams.items()})
+    distinct: dict[str, str] = {}
+    for group in groups:
+        for col in group.leftover:
+            distinct.setdefault(normalize_header(group.headers[col]), group.headers[col])
+    batches = [list(distinct.values())[i : i + MAPPING_BATCH_SIZE] for i in range(0, len(distinct), MAPPING_BATCH_SIZE)]
+    batch_of = {normalize_header(h): n for n, batch in enumerate(batches) for h in batch}
+    for group in groups:
+        group.batches = {batch_of[normalize_header(group.headers[col])] for col in group.leftover}
+
+    llm_by_header: dict[str, ColumnMapping] = {}
+    llm_usage = LLMUsage()
+    done: set[int] = set()
+
+    def parse_ready_groups() -> Iterator[ParseRecord]:
+        # Every ready sheet goes to the parse pool before the first result is awaited
+        ready: list[tuple[str, LLMMappingResponse, int]] = []
+        pooled: list[tuple] = []
+        for group in [g for g in groups if g.batches <= done]:
+            groups.remove(group)
+            for sheet_name in group.sheets:
+                header_row_idx, headers, _ = streams[sheet_name]
+                mapping = _sheet_mapping(group, headers, llm_by_header, header_row_idx)
+                sheet_mappings[sheet_name] = mapping
+                parts = []
+                if sheet_pool is not None and any(m.param_name is not None for m in mapping.mappings):
+                    parts = sheet_pool.parts(sheet_name, mapping, header_row_idx, data_row_counts[sheet_name])
+                    pooled.extend(parts)
+                ready.append((sheet_name, mapping, len(parts)))
+
+        results = sheet_pool.results(pooled, columnar) if pooled else None
+        for sheet_name, mapping, part_count in ready:
+            header_row_idx, headers, data_rows = streams[sheet_name]
+            if part_count:
+                for _ in range(part_count):
+                    yield from next(results)
+            elif session is None:
+                yield from _iter_sheet_rows(sheet_name, mapping, header_row_idx, data_rows, columnar)
+            else:
+                yield from _iter_ingested_sheet(
+                    session, wb, sheet_name, mapping, header_row_idx, _header_signature(headers),
+                    data_rows, None, content_hashes[sheet_name], columnar,
+                )
 
-        # One LLM call per sheet
-        mapping_result = _call_gemini_for_mapping(headers, sheet_name)
-        final_header_row = mapping_result.header_row_index
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="mapping") as pool:
+        label = ", ".join(streams) if len(streams) <= 3 else f"{len(streams)} sheets of this workbook"
+        pending: dict[Future, int] = {
+            pool.submit(_call_gemini_for_mapping, batch, label): n for n, batch in enumerate(batches)
+        }
+        # Fully local sheets, and sheets mapped on a previous upload, don't wait for the LLM at all
+        yield from parse_ready_groups()
+        for sheet_name, (header_row_idx, data_rows, previous) in known.items():
+            sheet_mappings[sheet_name] = previous.mapping
+            yield from _iter_ingested_sheet(
+                session, wb, sheet_name, previous.mapping, header_row_idx, previous.signature,
+                data_rows, previous, content_hashes[sheet_name], columnar,
+            )
 
-        # Build lookup: col_index → ColumnMapping
-        col_map: dict[int, ColumnMapping] = {m.col_index: m for m in mapping_result.mappings}
+        # Parse each sheet as soon as every batch covering its headers has come back
+        for future in as_completed(pending):
+            n = pending[future]
+            batch = batches[n]
+            result = future.result()
+            if result.usage is not None:
+                llm_usage += result.usage
+            for m in result.mappings:
+                if 0 <= m.col_index < len(batch):
+                    llm_by_header[normalize_header(batch[m.col_index])] = m
+            done.add(n)
+            yield from parse_ready_groups()
 
-        # Track unmapped columns
-        for mapping in mapping_result.mappings:
-            if mapping.param_name is None:
-                all_unmapped.append(
-                    UnmappedColumn(
-                        col=mapping.col_index,
-                        header=mapping.original_header,
-                        reason=mapping.reasoning or "No matching parameter found",
-                    )
-                )
+    all_duplicates: list[str] = []
+    final_header_row = 0
+    seen_param_asset: dict[str, int] = {}  # duplicate detection
+
+    # Duplicate detection runs in workbook order so flags don't depend on which call finished first
+    for sheet_name in wb.sheetnames:
+        mapping_result = sheet_mappings.get(sheet_name)
+        if mapping_result is None:
+            continue
+        final_header_row = mapping_result.header_row_index
 
-        # Duplicate detection
         for mapping in mapping_result.mappings:
             if mapping.param_name:
                 key = f"{mapping.param_name}::{mapping.asset_name or 'plant'}"
@@ -203,40 +780,14 @@ def parse_excel(file_bytes: bytes, filename: str) -> ParseResponse:
                 else:
                     seen_param_asset[key] = mapping.col_index
 
-        # Parse data rows
-        for row_offset, row in enumerate(data_rows):
-            actual_row_num = header_row_idx + 1 + row_offset + 2  # 1-indexed for display
-
-            for col_idx, cell_value in enumerate(row):
-                mapping = col_map.get(col_idx)
-                if mapping is None or mapping.param_name is None:
-                    continue
-
-                parsed = parse_value(cell_value)
-                raw_str = str(cell_value) if cell_value is not None else ""
+    if session is not None:
+        position = {name: i for i, name in enumerate(wb.sheetnames)}
+        session.deltas.sort(key=lambda d: position[d.sheet])
 
-                # Validation warnings
-                val_warnings = validate_value(mapping.param_name, parsed)
-                for w in val_warnings:
-                    all_warnings.append(f"Row {actual_row_num}, col {col_idx}: {w}")
-
-                all_parsed.append(
-                    ParsedCell(
-                        row=actual_row_num,
-                        col=col_idx,
-                        param_name=mapping.param_name,
-                        asset_name=mapping.asset_name,
-                        raw_value=raw_str,
-                        parsed_value=parsed,
-                        confidence=mapping.confidence,
-                    )
-                )
-
-    return ParseResponse(
+    yield SummaryRecord(
         status="success",
         header_row=final_header_row,
-        parsed_data=all_parsed,
-        unmapped_columns=all_unmapped,
-        warnings=all_warnings,
+        sheets=list(wb.sheetnames),
         duplicate_flags=all_duplicates,
-    )
\ No newline at end of file
+        llm_usage=llm_usage,
+    )
@@ -1,59 +1,36 @@
 """AI agent for suggesting parameters based on plant description (Track B stretch goal)."""
 import json
-import os
 import re
 
-import google.generativeai as genai
-
 from app.models.schemas import AISuggestionRequest, AISuggestionResponse
-from app.utils.registry import load_parameters
-
-genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+from app.utils.llm_client import MODEL, get_llm_client
+from app.utils.prompts import build_suggestion_prompt, usage_from_response
+from app.utils.registry import get_registry
+from app.utils.suggestion_cache import get_suggestion_cache
 
 
 def suggest_parameters(request: AISuggestionRequest) -> AISuggestionResponse:
-    """Use Gemini to suggest relevant parameters for a plant."""
-    params = load_parameters()
-    param_list = json.dumps(
-        [{"name": p["name"], "display_name": p["display_name"], "section": p["section"]} for p in params],
-        indent=2,
-    )
-
-    prompt = f"""You are an industrial ESG consultant helping configure a factory monitoring system.
-
-A new plant is being onboarded with:
-- Description: {request.plant_description}
-- Asset types present: {', '.join(request.asset_types)}
-
-Available parameters:
-{param_list}
+    """Use Gemini to suggest relevant parameters for a plant, unless a cached suggestion fits."""
+    cache = get_suggestion_cache()
+    cached = cache.get(request.plant_description, request.asset_types, MODEL)
+    if cached is not None:
+        return cached
 
-Based on the plant description and asset types, suggest which parameters are MOST RELEVANT to enable.
-Consider: what equipment is present, what energy sources are likely, what emissions to track.
+    params = get_registry().parameters
+    prompt = build_suggestion_prompt(request.plant_description, request.asset_types)
 
-Return ONLY valid JSON (no markdown):
-{{
-  "suggested_parameter_names": ["coal_consumption", "steam_generation", ...],
-  "reasoning": "Brief explanation of why these parameters were selected"
-}}"""
-
-    model = genai.GenerativeModel(MODEL)
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-                response_mime_type="application/json",
-            ),
-        )
+        response = get_llm_client().generate(prompt, temperature=0.3)
         raw = response.text.strip()
         raw = re.sub(r"^```(?:json)?\s*", "", raw)
         raw = re.sub(r"\s*```$", "", raw)
         data = json.loads(raw)
-        return AISuggestionResponse(**data)
+        result = AISuggestionResponse(**data, llm_usage=usage_from_response(response, prompt))
     except Exception as e:
         return AISuggestionResponse(
             suggested_parameter_names=[p["name"] for p in params],
             reasoning=f"Could not generate AI suggestion: {e}. Showing all parameters.",
-        )
\ No newline at end of file
+        )
+
+    cache.put(request.plant_description, request.asset_types, MODEL, result)
+    return result
\ No newline at end of file
@@ -18,6 +18,11 @@ async def lifespan(app: FastAPI):
     logger.info("LatSpace AI backend starting up...")
     logger.info(f"Gemini model: {os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')}")
     yield
+    from app.utils.jobs import shutdown_job_manager
+    from app.utils.parse_pool import shutdown_parse_pool
+
+    shutdown_job_manager()
+    shutdown_parse_pool()
     logger.info("LatSpace AI backend shutting down.")
 
 
@@ -37,6 +42,9 @@ app.add_middleware(
 )
 
 from app.routers import track_a, track_b  # noqa: E402
+from app.utils.uploads import UploadLimitMiddleware  # noqa: E402
+
+app.add_middleware(UploadLimitMiddleware, path_prefix=track_a.router.prefix)
 
 app.include_router(track_a.router)
 app.include_router(track_b.router)
@@ -44,4 +52,12 @@ app.include_router(track_b.router)
 
 @app.get("/health", tags=["Meta"])
 def health() -> dict:
-    return {"status": "ok", "version": "1.0.0"}
\ No newline at end of file
+    return {"status": "ok", "version": "1.0.0"}
+
+
+@app.get("/llm/stats", tags=["Meta"])
+def llm_stats() -> dict:
+    """Call, retry and hedge counters, circuit-breaker state and recent p95 latency of the shared LLM client."""
+    from app.utils.llm_client import get_llm_client
+
+    return get_llm_client().stats()
@@ -1,6 +1,6 @@
 """Pydantic models for structured LLM output and API responses."""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional, Union
 
 
 # ── Track A ────────────────────────────────────────────────────────────────
@@ -14,12 +14,31 @@ class ColumnMapping(BaseModel):
     reasoning: str = ""
 
 
+class LLMUsage(BaseModel):
+    """Token counts and estimated cost of the LLM calls behind one response."""
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    estimated_cost_usd: float = 0.0
+
+    def __add__(self, other: "LLMUsage") -> "LLMUsage":
+        return LLMUsage(
+            calls=self.calls + other.calls,
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+            cached_input_tokens=self.cached_input_tokens + other.cached_input_tokens,
+            estimated_cost_usd=round(self.estimated_cost_usd + other.estimated_cost_usd, 8),
+        )
+
+
 class LLMMappingResponse(BaseModel):
     """Structured output expected from the Gemini mapping call."""
     mappings: list[ColumnMapping]
     unmapped_headers: list[str] = []
     header_row_index: int = 0
     notes: str = ""
+    usage: Optional[LLMUsage] = None  # set on fresh LLM answers only, never on cached ones
 
 
 class ParsedCell(BaseModel):
@@ -45,6 +64,110 @@ class ParseResponse(BaseModel):
     unmapped_columns: list[UnmappedColumn]
     warnings: list[str]
     duplicate_flags: list[str] = []
+    llm_usage: LLMUsage = LLMUsage()
+
+
+class ParsedColumn(BaseModel):
+    """One mapped column of one sheet: metadata once, then parallel row/value arrays."""
+    sheet: str
+    col: int
+    param_name: str
+    asset_name: Optional[str] = None
+    confidence: str
+    rows: list[int]
+    values: list[Optional[float]]
+
+
+class ColumnarParseResponse(BaseModel):
+    """Compact alternative to ParseResponse, requested with format=columnar."""
+    status: str
+    header_row: int
+    columns: list[ParsedColumn]
+    unmapped_columns: list[UnmappedColumn]
+    warnings: list[str]
+    duplicate_flags: list[str] = []
+    llm_usage: LLMUsage = LLMUsage()
+
+
+# ── Track A streaming (NDJSON records) ─────────────────────────────────────
+
+class SheetMappingRecord(BaseModel):
+    type: Literal["sheet"] = "sheet"
+    sheet: str
+    header_row: int
+    mappings: list[ColumnMapping]
+    unmapped_columns: list[UnmappedColumn]
+
+
+class CellBatchRecord(BaseModel):
+    type: Literal["cells"] = "cells"
+    sheet: str
+    cells: list[ParsedCell]
+
+
+class ColumnBatchRecord(BaseModel):
+    type: Literal["columns"] = "columns"
+    sheet: str
+    columns: list[ParsedColumn]
+
+
+class WarningRecord(BaseModel):
+    type: Literal["warnings"] = "warnings"
+    sheet: str
+    warnings: list[str]
+
+
+class SummaryRecord(BaseModel):
+    """Always the last record of a successful stream."""
+    type: Literal["summary"] = "summary"
+    status: str
+    header_row: int
+    sheets: list[str]
+    duplicate_flags: list[str] = []
+    llm_usage: LLMUsage = LLMUsage()
+
+
+class ErrorRecord(BaseModel):
+    type: Literal["error"] = "error"
+    detail: str
+
+
+ParseRecord = Union[SheetMappingRecord, CellBatchRecord, ColumnBatchRecord, WarningRecord, SummaryRecord]
+
+
+# ── Track A background jobs ────────────────────────────────────────────────
+
+class JobProgress(BaseModel):
+    sheets_done: int = 0
+    rows_done: int = 0
+
+
+class ParseJob(BaseModel):
+    job_id: str
+    status: str = Field(pattern="^(queued|running|succeeded|failed|cancelled)$")
+    filename: str
+    media_type: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: JobProgress = JobProgress()
+    error: Optional[str] = None
+
+
+# ── Track A incremental ingestion ──────────────────────────────────────────
+
+class SheetDelta(BaseModel):
+    """What an incremental upload did with one sheet."""
+    sheet: str
+    status: Literal["new", "appended", "unchanged", "reparsed"]
+    first_row: Optional[int] = None  # first parsed row (1-indexed), when rows were parsed
+    new_rows: int = 0
+
+
+class IncrementalParseResponse(BaseModel):
+    workbook_key: str
+    sheets: list[SheetDelta]
+    result: Union[ParseResponse, ColumnarParseResponse]  # only the rows parsed by this upload
 
 
 # ── Track B ────────────────────────────────────────────────────────────────
@@ -84,6 +207,26 @@ class OnboardingConfig(BaseModel):
     formulas: list[FormulaConfig]
 
 
+class StoredOnboarding(BaseModel):
+    id: int
+    created_at: float
+    config: OnboardingConfig
+
+
+class PlantSummary(BaseModel):
+    id: int
+    name: str
+    address: str
+    created_at: float
+    asset_count: int
+    parameter_count: int
+
+
+class PlantPage(BaseModel):
+    items: list[PlantSummary]
+    next_after: Optional[int] = None  # pass as `after` to fetch the next page; None on the last page
+
+
 class FormulaValidationRequest(BaseModel):
     expression: str
     enabled_parameters: list[str]
@@ -96,6 +239,30 @@ class FormulaValidationResponse(BaseModel):
     error: Optional[str] = None
 
 
+class FormulaBatchValidationRequest(BaseModel):
+    formulas: list[FormulaConfig]
+    enabled_parameters: list[str]
+    changed: Optional[list[str]] = None  # only re-validate these formulas and their dependents
+
+
+class FormulaBatchValidationResponse(BaseModel):
+    valid: bool
+    order: list[str]  # evaluation order; formulas on or behind a cycle are left out
+    cycles: list[list[str]]
+    duplicate_formulas: list[str] = []
+    results: dict[str, FormulaValidationResponse]
+
+
+class FormulaEvaluationRequest(BaseModel):
+    formulas: list[FormulaConfig]
+    series: dict[str, list[Optional[float]]]  # parameter name → values, one per row
+
+
+class FormulaEvaluationResponse(BaseModel):
+    results: dict[str, list[Optional[float]]]
+    errors: dict[str, str] = {}
+
+
 class AISuggestionRequest(BaseModel):
     plant_description: str
     asset_types: list[str]
@@ -103,4 +270,5 @@ class AISuggestionRequest(BaseModel):
 
 class AISuggestionResponse(BaseModel):
     suggested_parameter_names: list[str]
-    reasoning: str
\ No newline at end of file
+    reasoning: str
+    llm_usage: LLMUsage = LLMUsage()
\ No newline at end of file
@@ -1,32 +1,188 @@
 """Track A: Excel Parser API endpoints."""
-from fastapi import APIRouter, File, HTTPException, UploadFile
+import logging
+from collections.abc import Iterator
 
-from app.agents.excel_parser import parse_excel
-from app.models.schemas import ParseResponse
+from fastapi import APIRouter, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 
+from app.agents.excel_parser import ingest_excel, iter_parse_excel, parse_excel
+from app.models.schemas import (
+    ColumnarParseResponse,
+    ErrorRecord,
+    IncrementalParseResponse,
+    ParseJob,
+    ParseResponse,
+)
+from app.utils.ingest_state import get_ingest_store
+from app.utils.jobs import get_job_manager
+from app.utils.mapping_cache import get_mapping_cache
+from app.utils.parse_cache import get_parse_cache
+from app.utils.response_encoding import ROWS_JSON, encode_columnar, negotiate
+from app.utils.uploads import check_spreadsheet_upload, persist_upload, spool_upload
+
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/track-a", tags=["Track A: Excel Parser"])
 
 
-@router.post("/parse", response_model=ParseResponse, summary="Parse an Excel file")
-async def parse_excel_file(file: UploadFile = File(...)) -> ParseResponse:
+@router.post(
+    "/parse",
+    response_model=ParseResponse,
+    summary="Parse an Excel file",
+    responses={200: {"model": ColumnarParseResponse, "description": "Row or columnar layout, see `format`"}},
+)
+async def parse_excel_file(
+    file: UploadFile = File(...),
+    format: str | None = Query(default=None, description="rows (default), columnar, msgpack or arrow"),
+    accept: str | None = Header(default=None),
+) -> ParseResponse | Response:
     """
-    Upload an .xlsx file and get back structured, validated JSON.
+    Upload a spreadsheet (.xlsx, .csv/.tsv, .ods, or .xls when `xlrd` is installed) and get
+    back structured, validated JSON.
 
     - Detects header rows automatically
     - Maps messy column names to canonical parameters using AI
     - Detects asset references in column headers
     - Parses and validates all numeric values
     - Flags unmapped columns, duplicates, and suspicious values
-    """
-    if not file.filename or not file.filename.endswith(".xlsx"):
-        raise HTTPException(status_code=400, detail="Only .xlsx files are supported.")
 
-    contents = await file.read()
-    if len(contents) > 20 * 1024 * 1024:  # 20MB limit
-        raise HTTPException(status_code=413, detail="File too large. Max 20MB.")
+    Pass `format=columnar` (or `Accept: application/vnd.latspace.columnar+json`) for one entry
+    per mapped column instead of one object per cell; `msgpack` and `arrow` encode that same
+    columnar layout as MessagePack or an Arrow IPC stream.
+    """
+    media_type = negotiate(format, accept)
+    check_spreadsheet_upload(file)
 
     try:
-        result = parse_excel(contents, file.filename)
+        # Off the event loop, so a long parse does not stall /health or Track B.
+        # The upload is already spooled by the framework and is read in place.
+        result = await run_in_threadpool(parse_excel, file.file, file.filename, columnar=media_type != ROWS_JSON)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
+
+    if media_type == ROWS_JSON:
         return result
+    return Response(content=await run_in_threadpool(encode_columnar, result, media_type), media_type=media_type)
+
+
+@router.post("/parse/stream", summary="Parse an Excel file as an NDJSON stream")
+async def parse_excel_stream(
+    file: UploadFile = File(...),
+    format: str = Query(default="rows", pattern="^(rows|columnar)$"),
+) -> StreamingResponse:
+    """
+    Same parse as `/parse`, emitted as newline-delimited JSON while it runs.
+
+    Record types (the `type` field): `sheet` (header mapping for one sheet), `cells` or
+    `columns` (a batch of parsed values, depending on `format`), `warnings`, and a final
+    `summary` carrying duplicate flags. A failure mid-stream ends with an `error` record.
+    """
+    spool = await spool_upload(file)
+    filename = file.filename
+
+    def lines() -> Iterator[bytes]:
+        try:
+            for record in iter_parse_excel(spool, filename, columnar=format == "columnar"):
+                yield record.model_dump_json().encode() + b"\n"
+        except Exception as e:
+            logger.exception("Streaming parse failed")
+            yield ErrorRecord(detail=f"Parsing failed: {str(e)}").model_dump_json().encode() + b"\n"
+        finally:
+            spool.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/ingest", response_model=IncrementalParseResponse, summary="Incrementally parse a re-uploaded workbook")
+async def ingest_excel_file(
+    file: UploadFile = File(...),
+    plant: str | None = Query(default=None, description="Plant the workbook belongs to; identifies it with the filename"),
+    key: str | None = Query(default=None, description="Explicit workbook identity, instead of plant + filename"),
+    format: str = Query(default="rows", pattern="^(rows|columnar)$"),
+) -> IncrementalParseResponse:
+    """
+    For workbooks that grow by appended rows and are uploaded again in full (e.g. one per
+    month, a row added each day). Returns only what changed since the previous upload of
+    the same workbook: unchanged sheets are skipped, known sheets reuse their stored
+    mapping and yield only new rows. `sheets` reports what happened to each sheet.
+    """
+    check_spreadsheet_upload(file)
+    workbook_key = key or (f"{plant}/{file.filename}" if plant else None)
+    if not workbook_key:
+        raise HTTPException(status_code=400, detail="Pass `plant` (combined with the filename) or an explicit `key`.")
+
+    try:
+        return await run_in_threadpool(
+            ingest_excel, file.file, file.filename, workbook_key, columnar=format == "columnar"
+        )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
+
+
+@router.delete("/ingest", summary="Forget a workbook's ingestion state")
+def reset_ingest_state(key: str = Query(..., description="Workbook identity, e.g. `<plant>/<filename>`")) -> dict:
+    """The next upload of the workbook is then parsed in full."""
+    if not get_ingest_store().forget(key):
+        raise HTTPException(status_code=404, detail=f"No ingestion state for '{key}'.")
+    return {"forgotten": key}
+
+
+@router.post("/jobs", response_model=ParseJob, status_code=202, summary="Start a background parse job")
+async def create_parse_job(
+    file: UploadFile = File(...),
+    format: str | None = Query(default=None, description="rows (default), columnar, msgpack or arrow"),
+    accept: str | None = Header(default=None),
+) -> ParseJob:
+    """
+    Queue the same parse as `/parse` on the worker pool and return immediately with a job id.
+    Poll `GET /jobs/{job_id}` for status and progress, then fetch `GET /jobs/{job_id}/result`.
+    """
+    media_type = negotiate(format, accept)
+    path = await persist_upload(file)
+    return await run_in_threadpool(get_job_manager().submit, path, file.filename, media_type)
+
+
+@router.get("/jobs/{job_id}", response_model=ParseJob, summary="Parse job status")
+async def get_parse_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=60, description="Long-poll up to this many seconds for completion"),
+) -> ParseJob:
+    manager = get_job_manager()
+    job = await manager.wait(job_id, wait) if wait else manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@router.get("/jobs/{job_id}/result", summary="Parse job result")
+def get_parse_job_result(job_id: str) -> Response:
+    """The finished parse, encoded in the format requested when the job was created."""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}.")
+    return Response(content=manager.result(job_id), media_type=job.media_type)
+
+
+@router.delete("/jobs/{job_id}", response_model=ParseJob, summary="Cancel a parse job")
+def cancel_parse_job(job_id: str) -> ParseJob:
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job
+
+
+@router.get("/mapping-cache/stats", summary="Header-mapping cache statistics")
+def mapping_cache_stats() -> dict:
+    """Hit/miss/eviction counters and entry counts for both cache tiers."""
+    return get_mapping_cache().stats()
+
+
+@router.get("/parse-cache/stats", summary="Parse result cache statistics")
+def parse_cache_stats() -> dict:
+    """Hits, coalesced duplicate uploads, misses, evictions and the cache's current size."""
+    return get_parse_cache().stats()
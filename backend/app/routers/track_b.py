@@ -1,50 +1,68 @@
 """Track B: Parameter Onboarding Wizard API endpoints."""
-import ast
 import logging
 import re
 
-from fastapi import APIRouter, HTTPException
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 
 from app.agents.parameter_suggester import suggest_parameters
 from app.models.schemas import (
     AISuggestionRequest,
     AISuggestionResponse,
+    FormulaBatchValidationRequest,
+    FormulaBatchValidationResponse,
+    FormulaEvaluationRequest,
+    FormulaEvaluationResponse,
     FormulaValidationRequest,
     FormulaValidationResponse,
     OnboardingConfig,
+    PlantPage,
+    StoredOnboarding,
 )
-from app.utils.registry import get_parameter_names, load_parameters
+from app.utils.formula_engine import FormulaError, compile_formula
+from app.utils.formula_graph import FormulaGraph
+from app.utils.http_cache import ResponseCache, cached_json_response
+from app.utils.onboarding_store import duplicate_names, get_onboarding_store
+from app.utils.registry import get_registry
+from app.utils.suggestion_cache import get_suggestion_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/track-b", tags=["Track B: Onboarding Wizard"])
 
 ALLOWED_FORMULA_TOKENS = re.compile(r"^[a-z0-9_\s\+\-\*\/\(\)\.\,]+$", re.IGNORECASE)
+_registry_responses = ResponseCache()
 
 
-@router.get("/parameters", summary="Get parameter registry")
-def get_parameters(asset_types: str = "") -> list[dict]:
+@router.get(
+    "/parameters",
+    summary="Get parameter registry",
+    response_class=Response,
+    responses={200: {"content": {"application/json": {}}}, 304: {"description": "Not modified"}},
+)
+def get_parameters(request: Request, asset_types: str = "") -> Response:
     """
     Return parameter registry, optionally filtered by asset types.
     Query param: asset_types=boiler,turbine
+
+    Responses carry a strong ETag tied to the registry version and filter; send it back in
+    If-None-Match to get a 304. Bodies are gzip- or brotli-encoded when the client accepts it.
     """
-    params = load_parameters()
-    if not asset_types:
-        return params
+    registry = get_registry()
+    requested = sorted({t.strip().lower() for t in asset_types.split(",") if t.strip()})
+    key = ",".join(requested)
 
-    from app.utils.registry import load_assets
+    def build() -> list[dict]:
+        return registry.parameters_for_asset_types(requested) if requested else list(registry.parameters)
 
-    requested_types = {t.strip().lower() for t in asset_types.split(",") if t.strip()}
-    assets = load_assets()
-    matching_assets = {a["name"] for a in assets if a["type"].lower() in requested_types}
-    return [p for p in params if any(a in matching_assets for a in p.get("applicable_assets", []))]
+    return cached_json_response(request, _registry_responses, registry.version, key, build)
 
 
 @router.post("/validate-formula", response_model=FormulaValidationResponse)
 def validate_formula(request: FormulaValidationRequest) -> FormulaValidationResponse:
     """
     Validate a formula expression.
-    - Checks syntax is safe (no exec/eval injection)
+    - Checks syntax is safe: only arithmetic, numbers, parameter names and whitelisted math functions
     - Checks all referenced parameter names exist in the enabled set
     """
     expr = request.expression.strip()
@@ -58,19 +76,18 @@ def validate_formula(request: FormulaValidationRequest) -> FormulaValidationResp
             valid=False, depends_on=[], missing_params=[], error="Formula contains invalid characters"
         )
 
-    # Extract referenced parameter names (words that look like param names)
-    all_param_names = set(get_parameter_names())
-    tokens = re.findall(r"[a-z][a-z0-9_]*", expr, re.IGNORECASE)
-    referenced = [t for t in tokens if t in all_param_names]
-    missing = [t for t in referenced if t not in set(request.enabled_parameters)]
-
-    # Try to parse as valid Python expression
+    # Compile with the formula engine: whitelisted syntax only, and cached for evaluation later
     try:
-        # Replace param names with 1.0 for syntax check
-        test_expr = re.sub(r"[a-z][a-z0-9_]*", "1.0", expr, flags=re.IGNORECASE)
-        ast.parse(test_expr, mode="eval")
-    except SyntaxError as e:
-        return FormulaValidationResponse(valid=False, depends_on=referenced, missing_params=missing, error=str(e))
+        names = compile_formula(expr).depends_on
+        error = None
+    except FormulaError as e:
+        names, error = re.findall(r"[a-z][a-z0-9_]*", expr, re.IGNORECASE), str(e)
+
+    all_param_names = get_registry().parameters_by_name
+    referenced = [n for n in names if n in all_param_names]
+    missing = [n for n in referenced if n not in set(request.enabled_parameters)]
+    if error:
+        return FormulaValidationResponse(valid=False, depends_on=referenced, missing_params=missing, error=error)
 
     return FormulaValidationResponse(
         valid=len(missing) == 0,
@@ -80,24 +97,120 @@ def validate_formula(request: FormulaValidationRequest) -> FormulaValidationResp
     )
 
 
+@router.post("/validate-formulas", response_model=FormulaBatchValidationResponse)
+def validate_formulas(request: FormulaBatchValidationRequest) -> FormulaBatchValidationResponse:
+    """
+    Validate every formula of a configuration in one call.
+    - Builds the dependency graph between formulas and returns a topological evaluation order
+    - Reports cycles, and inputs that neither an enabled parameter nor another formula provides
+    - With `changed`, only those formulas and their downstream dependents are re-validated
+    """
+    graph = FormulaGraph.build(request.formulas, request.enabled_parameters)
+    order = graph.order()
+    cycles = graph.cycles()
+    in_cycle = {p for cycle in cycles for p in cycle}
+    ordered = set(order)
+
+    targets = graph.nodes.keys() if request.changed is None else graph.downstream(request.changed)
+    results: dict[str, FormulaValidationResponse] = {}
+    for parameter in [p for p in graph.nodes if p in targets]:
+        node = graph.nodes[parameter]
+        missing = graph.missing_inputs(parameter)
+        if node.error:
+            error = node.error
+        elif parameter in in_cycle:
+            error = "Formula is part of a dependency cycle"
+        elif parameter not in ordered:
+            error = "Depends on a formula in a dependency cycle"
+        elif missing:
+            error = f"Missing inputs: {missing}"
+        else:
+            error = None
+        results[parameter] = FormulaValidationResponse(
+            valid=error is None, depends_on=list(node.depends_on), missing_params=missing, error=error
+        )
+
+    return FormulaBatchValidationResponse(
+        valid=not cycles and not graph.duplicates and all(r.valid for r in results.values()),
+        order=order,
+        cycles=cycles,
+        duplicate_formulas=graph.duplicates,
+        results=results,
+    )
+
+
+@router.post("/evaluate-formulas", response_model=FormulaEvaluationResponse)
+def evaluate_formulas(request: FormulaEvaluationRequest) -> FormulaEvaluationResponse:
+    """
+    Compute derived parameters over input series, in the order given; each result is
+    available to the formulas after it. Missing values and undefined results are null.
+    """
+    columns: dict[str, np.ndarray] = {
+        name: np.array(values, dtype=np.float64) for name, values in request.series.items()
+    }
+    results: dict[str, list[float | None]] = {}
+    errors: dict[str, str] = {}
+    for formula in request.formulas:
+        try:
+            values = compile_formula(formula.expression).evaluate(columns)
+        except (FormulaError, ValueError) as e:
+            errors[formula.parameter] = str(e)
+            continue
+        columns[formula.parameter] = values
+        results[formula.parameter] = [None if v != v else v for v in values.tolist()]
+    return FormulaEvaluationResponse(results=results, errors=errors)
+
+
 @router.post("/suggest-parameters", response_model=AISuggestionResponse)
 def suggest_params(request: AISuggestionRequest) -> AISuggestionResponse:
     """AI-powered parameter suggestion based on plant description."""
     return suggest_parameters(request)
 
 
+@router.get("/suggestion-cache/stats", summary="AI suggestion cache statistics")
+def suggestion_cache_stats() -> dict:
+    """Exact and similarity hit counters, misses, expirations and entry count."""
+    return get_suggestion_cache().stats()
+
+
 @router.post("/onboarding", summary="Submit final onboarding config")
 def submit_onboarding(config: OnboardingConfig) -> JSONResponse:
-    """
-    Accept the final plant configuration.
-    In production this would persist to DB. For now, validates and echoes back.
-    """
-    logger.info(f"New plant onboarded: {config.plant.name}")
+    """Accept the final plant configuration and persist it; the response carries the new plant id."""
+    duplicates = duplicate_names(config)
+    if duplicates:
+        raise HTTPException(status_code=422, detail=f"Duplicate names in configuration: {', '.join(duplicates)}")
+    plant_id = get_onboarding_store().save(config)
+    logger.info(f"New plant onboarded: {config.plant.name} (id {plant_id})")
     return JSONResponse(
         content={
             "status": "success",
             "message": f"Plant '{config.plant.name}' successfully onboarded with "
                        f"{len(config.assets)} assets and {len(config.parameters)} parameters.",
+            "plant_id": plant_id,
             "config": config.model_dump(),
         }
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/plants", response_model=PlantPage, summary="List onboarded plants")
+def list_plants(limit: int = Query(default=50, ge=1, le=500), after: int = 0) -> PlantPage:
+    """Pages in id order: pass the previous page's `next_after` as `after`."""
+    return get_onboarding_store().list_plants(limit, after)
+
+
+@router.get("/plants/{plant_id}", response_model=StoredOnboarding, summary="Get an onboarded plant")
+def get_plant(plant_id: int) -> StoredOnboarding:
+    stored = get_onboarding_store().get(plant_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Plant {plant_id} not found.")
+    return stored
+
+
+@router.get("/parameters/{name}/plants", response_model=PlantPage, summary="Plants using a parameter")
+def plants_using_parameter(name: str, limit: int = Query(default=50, ge=1, le=500), after: int = 0) -> PlantPage:
+    return get_onboarding_store().plants_using_parameter(name, limit, after)
+
+
+@router.get("/assets/{name}/plants", response_model=PlantPage, summary="Plants with an asset")
+def plants_with_asset(name: str, limit: int = Query(default=50, ge=1, le=500), after: int = 0) -> PlantPage:
+    return get_onboarding_store().plants_with_asset(name, limit, after)
@@ -0,0 +1,150 @@
+"""
+Safe, vectorized evaluation of onboarding formulas.
+An expression is parsed once, checked against a whitelist of AST nodes (arithmetic,
+numeric literals, parameter names and a few math functions) and compiled to a code object.
+Evaluation runs that code over whole NumPy columns, so a derived parameter costs a handful
+of array operations regardless of the row count. Compiled formulas are cached by text.
+"""
+import ast
+import os
+from collections.abc import Mapping
+from dataclasses import dataclass
+from functools import lru_cache, reduce
+from types import CodeType
+
+import numpy as np
+
+from app.models.schemas import ParsedColumn
+
+FORMULA_CACHE_SIZE = int(os.getenv("FORMULA_CACHE_SIZE", "1024"))
+
+FUNCTIONS = {
+    "abs": np.abs,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "min": lambda *args: reduce(np.minimum, args),
+    "max": lambda *args: reduce(np.maximum, args),
+}
+_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+
+class FormulaError(ValueError):
+    pass
+
+
+class _Checker(ast.NodeTransformer):
+    """Rejects anything outside the whitelist and collects the referenced parameter names."""
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+
+    def visit_Expression(self, node: ast.Expression) -> ast.AST:
+        self.generic_visit(node)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, _BINARY_OPS):
+            raise FormulaError(f"Operator '{type(node.op).__name__}' is not allowed")
+        self.generic_visit(node)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, _UNARY_OPS):
+            raise FormulaError(f"Operator '{type(node.op).__name__}' is not allowed")
+        self.generic_visit(node)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise FormulaError(f"Only numeric literals are allowed, got {node.value!r}")
+        # Float literals keep `9**9**9` from becoming an unbounded integer computation
+        try:
+            value = float(node.value)
+        except OverflowError:
+            raise FormulaError(f"Numeric literal is too large: {str(node.value)[:20]}...") from None
+        return ast.copy_location(ast.Constant(value), node)
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id in FUNCTIONS:
+            raise FormulaError(f"'{node.id}' is a function and must be called")
+        if node.id.startswith("_"):
+            raise FormulaError(f"Invalid parameter name '{node.id}'")
+        if node.id not in self.names:
+            self.names.append(node.id)
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise FormulaError(f"Only these functions are allowed: {', '.join(FUNCTIONS)}")
+        if node.keywords or not node.args:
+            raise FormulaError(f"'{node.func.id}' takes positional arguments only")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        if not isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.operator, ast.unaryop, ast.Load)):
+            raise FormulaError(f"'{type(node).__name__}' is not allowed in a formula")
+        return super().generic_visit(node)
+
+
+@dataclass(frozen=True)
+class CompiledFormula:
+    expression: str
+    depends_on: tuple[str, ...]  # parameter names in order of first appearance
+    code: CodeType
+
+    def evaluate(self, columns: Mapping[str, object]) -> np.ndarray:
+        """
+        Evaluate over columns (parameter name → array-like of floats, None as missing).
+        Inputs broadcast like NumPy arrays; missing values and results that are not finite
+        (division by zero, log of a negative) come back as NaN.
+        """
+        missing = [n for n in self.depends_on if n not in columns]
+        if missing:
+            raise FormulaError(f"Missing inputs: {', '.join(missing)}")
+        namespace = {n: np.asarray(columns[n], dtype=np.float64) for n in self.depends_on}
+        try:
+            with np.errstate(all="ignore"):
+                result = np.asarray(eval(self.code, {"__builtins__": {}, **FUNCTIONS}, namespace), dtype=np.float64)
+        except ArithmeticError as e:  # only pure-literal parts can raise; arrays give inf/NaN
+            raise FormulaError(f"Cannot evaluate: {e}") from None
+        return np.where(np.isfinite(result), result, np.nan)
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(expression: str) -> CompiledFormula:
+    """Parse, whitelist-check and compile an expression; raises FormulaError when it is unsafe or invalid."""
+    checker = _Checker()
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+        tree = ast.fix_missing_locations(checker.visit(tree))
+        code = compile(tree, "<formula>", "eval")
+    except SyntaxError as e:
+        raise FormulaError(f"Syntax error: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise FormulaError("Formula is too deeply nested") from None
+    return CompiledFormula(expression, tuple(checker.names), code)
+
+
+def evaluate_formula(expression: str, columns: Mapping[str, object]) -> np.ndarray:
+    return compile_formula(expression).evaluate(columns)
+
+
+def align_columns(columns: list[ParsedColumn], asset_name: str | None = None) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Line up parsed Track A columns of one sheet (and optionally one asset) by row number.
+    Returns (rows, {param_name: values}) where every array follows the sorted union of the
+    columns' rows and gaps are NaN, ready to pass to CompiledFormula.evaluate.
+    """
+    selected = [c for c in columns if asset_name is None or c.asset_name == asset_name]
+    row_arrays = [np.asarray(c.rows, dtype=np.int64) for c in selected]
+    rows = np.unique(np.concatenate(row_arrays)) if row_arrays else np.empty(0, dtype=np.int64)
+    series: dict[str, np.ndarray] = {}
+    for column, column_rows in zip(selected, row_arrays):
+        values = np.full(len(rows), np.nan)
+        values[np.searchsorted(rows, column_rows)] = np.array(column.values, dtype=np.float64)
+        series[column.param_name] = values
+    return rows, series
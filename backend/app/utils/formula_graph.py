@@ -0,0 +1,129 @@
+"""
+Dependency graph over all formulas of an onboarding configuration.
+Nodes are the parameters that formulas define; an edge runs from every formula a
+formula reads to that formula. One pass yields a topological evaluation order, the
+cycles, and the inputs no enabled parameter or other formula provides. After an edit,
+only the edited formulas and their downstream dependents need validating again.
+"""
+from collections import deque
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from app.models.schemas import FormulaConfig
+from app.utils.formula_engine import FormulaError, compile_formula
+
+
+@dataclass
+class FormulaNode:
+    parameter: str
+    expression: str
+    depends_on: tuple[str, ...] = ()
+    error: str | None = None
+
+
+@dataclass
+class FormulaGraph:
+    inputs: frozenset[str]  # enabled parameters with measured values
+    nodes: dict[str, FormulaNode] = field(default_factory=dict)
+    dependents: dict[str, set[str]] = field(default_factory=dict)  # parameter → formulas reading it
+    duplicates: list[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, formulas: Iterable[FormulaConfig], inputs: Iterable[str]) -> "FormulaGraph":
+        graph = cls(inputs=frozenset(inputs))
+        for formula in formulas:
+            if formula.parameter in graph.nodes:
+                graph.duplicates.append(formula.parameter)
+            graph.set_formula(formula)
+        return graph
+
+    def set_formula(self, formula: FormulaConfig) -> set[str]:
+        """Add or replace one formula; returns it plus every formula downstream of it."""
+        old = self.nodes.get(formula.parameter)
+        if old is not None:
+            for name in old.depends_on:
+                self.dependents.get(name, set()).discard(formula.parameter)
+
+        node = FormulaNode(formula.parameter, formula.expression)
+        try:
+            node.depends_on = compile_formula(formula.expression).depends_on  # cached by text
+        except FormulaError as e:
+            node.error = str(e)
+        self.nodes[formula.parameter] = node
+        for name in node.depends_on:
+            self.dependents.setdefault(name, set()).add(formula.parameter)
+        return self.downstream([formula.parameter])
+
+    def downstream(self, parameters: Iterable[str]) -> set[str]:
+        """The given formulas and everything that reads them, directly or transitively."""
+        seen = {p for p in parameters if p in self.nodes}
+        queue = deque(seen)
+        while queue:
+            for dependent in self.dependents.get(queue.popleft(), ()):
+                if dependent not in seen:
+                    seen.add(dependent)
+                    queue.append(dependent)
+        return seen
+
+    def missing_inputs(self, parameter: str) -> list[str]:
+        return [n for n in self.nodes[parameter].depends_on if n not in self.inputs and n not in self.nodes]
+
+    def order(self) -> list[str]:
+        """Kahn's algorithm in definition order; formulas on or behind a cycle are left out."""
+        position = {p: i for i, p in enumerate(self.nodes)}
+        indegree = {p: sum(1 for n in node.depends_on if n in self.nodes) for p, node in self.nodes.items()}
+        queue = deque(p for p, d in indegree.items() if d == 0)
+        ordered: list[str] = []
+        while queue:
+            parameter = queue.popleft()
+            ordered.append(parameter)
+            for dependent in sorted(self.dependents.get(parameter, ()), key=position.__getitem__):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+        return ordered
+
+    def cycles(self) -> list[list[str]]:
+        """Strongly connected components that form a cycle (Tarjan, iterative)."""
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        found: list[list[str]] = []
+        counter = 0
+
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(self.nodes[root].depends_on))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                parameter, children = work[-1]
+                child = next((c for c in children if c in self.nodes), None)
+                if child is not None:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.nodes[child].depends_on)))
+                    elif child in on_stack:
+                        low[parameter] = min(low[parameter], index[child])
+                    continue
+                work.pop()
+                if work:
+                    low[work[-1][0]] = min(low[work[-1][0]], low[parameter])
+                if low[parameter] == index[parameter]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == parameter:
+                            break
+                    if len(component) > 1 or parameter in self.nodes[parameter].depends_on:
+                        found.append(component[::-1])
+        return found
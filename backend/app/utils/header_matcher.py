@@ -0,0 +1,210 @@
+"""
+Deterministic header → parameter matcher built from the registry.
+Resolves the obvious headers locally so only the ambiguous ones reach the LLM.
+
+Headers are tokenized, an embedded asset reference ("AFBC-1", "TG1", "Boiler 2") is
+extracted first, and the remaining tokens are scored against every parameter's name and
+display name. Tokens match exactly, by consonant skeleton ("Effcncy" ~ "efficiency"),
+by prefix ("Gen" ~ "generation") or by character trigram overlap.
+"""
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+
+from app.models.schemas import ColumnMapping
+from app.utils.registry import get_registry
+
+MATCH_THRESHOLD = float(os.getenv("LOCAL_MATCH_THRESHOLD", "0.85"))
+MATCH_MARGIN = float(os.getenv("LOCAL_MATCH_MARGIN", "0.1"))
+LOCAL_MATCHER_ENABLED = os.getenv("LOCAL_MATCHER_ENABLED", "1") != "0"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_VOWELS = str.maketrans("", "", "aeiou")
+
+# Columns the mapping prompt already tells the LLM to leave unmapped
+GENERIC_TOKENS = {
+    "date", "day", "month", "year", "time", "shift", "sr", "sl", "s", "no", "serial",
+    "remarks", "remark", "comments", "comment", "notes", "note",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _skeleton(token: str) -> str:
+    return token.translate(_VOWELS)
+
+
+def _trigrams(token: str) -> set[str]:
+    padded = f"#{token}#"
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _token_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    if a.isdigit() or b.isdigit():
+        return 0.0
+    short, long_ = sorted((a, b), key=len)
+    if len(short) >= 3:
+        if _skeleton(a) == _skeleton(b):
+            return 0.9
+        if long_.startswith(short):
+            return 0.85
+    ta, tb = _trigrams(a), _trigrams(b)
+    dice = 2 * len(ta & tb) / (len(ta) + len(tb))
+    return 0.8 * dice if dice >= 0.6 else 0.0
+
+
+def _phrase_score(phrase: tuple[str, ...], tokens: list[str]) -> float:
+    """Dice-style alignment score between a registry phrase and the header tokens."""
+    if not phrase or not tokens:
+        return 0.0
+    unused = list(tokens)
+    total = 0.0
+    for p in phrase:
+        best, best_i = 0.0, -1
+        for i, t in enumerate(unused):
+            sim = _token_similarity(p, t)
+            if sim > best:
+                best, best_i = sim, i
+        if best_i >= 0:
+            total += best
+            unused.pop(best_i)
+    return 2 * total / (len(phrase) + len(tokens))
+
+
+@dataclass(frozen=True)
+class HeaderMatch:
+    param_name: str | None
+    asset_name: str | None
+    score: float
+    reasoning: str
+
+
+@dataclass
+class HeaderMatcher:
+    """Token / skeleton / trigram index over parameter names, display names and asset aliases."""
+
+    parameters: list[dict]
+    assets: list[dict]
+    _phrases: dict[str, list[tuple[str, ...]]] = field(default_factory=dict, init=False)
+    _asset_aliases: list[tuple[tuple[str, ...], str]] = field(default_factory=list, init=False)
+    _applicable: dict[str, set[str]] = field(default_factory=dict, init=False)
+    _token_index: dict[str, set[str]] = field(default_factory=dict, init=False)
+    _trigram_index: dict[str, set[str]] = field(default_factory=dict, init=False)
+    _unit_tokens: set[str] = field(default_factory=set, init=False)
+
+    def __post_init__(self) -> None:
+        for p in self.parameters:
+            phrases = {tuple(p["name"].split("_")), tuple(_tokens(p["display_name"]))}
+            self._phrases[p["name"]] = [ph for ph in phrases if ph]
+            self._applicable[p["name"]] = set(p.get("applicable_assets", []))
+            self._unit_tokens.update(_tokens(p.get("unit", "")))
+            for phrase in phrases:
+                for token in phrase:
+                    self._token_index.setdefault(token, set()).add(p["name"])
+                    self._token_index.setdefault(_skeleton(token), set()).add(p["name"])
+                    for gram in _trigrams(token):
+                        self._trigram_index.setdefault(gram, set()).add(p["name"])
+
+        alias_owners: dict[tuple[str, ...], set[str]] = {}
+        for a in self.assets:
+            name_tokens = tuple(_tokens(a["name"]))
+            aliases = {name_tokens, ("".join(name_tokens),), tuple(_tokens(a["display_name"]))}
+            number = re.search(r"(\d+)$", a["name"])
+            if number:
+                aliases.add((a["type"].lower(), number.group(1)))
+            for alias in aliases:
+                if alias and alias[0]:
+                    alias_owners.setdefault(alias, set()).add(a["name"])
+        # Aliases shared by several assets are ambiguous; longest aliases are tried first
+        self._asset_aliases = sorted(
+            ((alias, next(iter(owners))) for alias, owners in alias_owners.items() if len(owners) == 1),
+            key=lambda item: -len(item[0]),
+        )
+
+    def _extract_asset(self, tokens: list[str]) -> tuple[str | None, list[str]]:
+        for alias, asset_name in self._asset_aliases:
+            n = len(alias)
+            for i in range(len(tokens) - n + 1):
+                if tuple(tokens[i : i + n]) == alias:
+                    return asset_name, tokens[:i] + tokens[i + n :]
+        return None, tokens
+
+    def _candidates(self, tokens: list[str]) -> set[str]:
+        found: set[str] = set()
+        for t in tokens:
+            found |= self._token_index.get(t, set()) | self._token_index.get(_skeleton(t), set())
+            for gram in _trigrams(t):
+                found |= self._trigram_index.get(gram, set())
+        return found
+
+    def match(self, header: str) -> HeaderMatch | None:
+        """Return a confident match for one header, or None when the LLM should decide."""
+        tokens = _tokens(header)
+        if not tokens:
+            return HeaderMatch(None, None, 1.0, "Empty header")
+        if all(t in GENERIC_TOKENS for t in tokens):
+            return HeaderMatch(None, None, 1.0, "Generic non-parameter column")
+
+        asset_name, remainder = self._extract_asset(tokens)
+        remainder = [t for t in remainder if t not in self._unit_tokens]
+        if not remainder:
+            return None
+
+        candidates = self._candidates(remainder)
+        if asset_name:
+            candidates = {c for c in candidates if asset_name in self._applicable[c]}
+
+        scored = sorted(
+            ((max(_phrase_score(ph, remainder) for ph in self._phrases[c]), c) for c in candidates),
+            reverse=True,
+        )
+        if not scored:
+            return None
+        best_score, best_param = scored[0]
+        runner_up = scored[1][0] if len(scored) > 1 else 0.0
+        if best_score < MATCH_THRESHOLD or best_score - runner_up < MATCH_MARGIN:
+            return None
+        reasoning = f"Local match (score {best_score:.2f})" + (f" with asset suffix {asset_name}" if asset_name else "")
+        return HeaderMatch(best_param, asset_name, best_score, reasoning)
+
+    def match_headers(self, headers: list[str]) -> tuple[list[ColumnMapping], list[int]]:
+        """Split headers into locally resolved mappings and the column indexes left for the LLM."""
+        resolved: list[ColumnMapping] = []
+        leftover: list[int] = []
+        for i, header in enumerate(headers):
+            m = self.match(header)
+            if m is None:
+                leftover.append(i)
+                continue
+            resolved.append(
+                ColumnMapping(
+                    col_index=i,
+                    original_header=header,
+                    param_name=m.param_name,
+                    asset_name=m.asset_name,
+                    confidence="high" if m.score >= 0.95 else "medium",
+                    reasoning=m.reasoning,
+                )
+            )
+        return resolved, leftover
+
+
+_matcher: HeaderMatcher | None = None
+_matcher_version: str | None = None
+_matcher_lock = threading.Lock()
+
+
+def get_header_matcher() -> HeaderMatcher:
+    """Matcher for the current registry, rebuilt whenever the registry files change."""
+    global _matcher, _matcher_version
+    registry = get_registry()
+    with _matcher_lock:
+        if _matcher is None or _matcher_version != registry.version:
+            _matcher = HeaderMatcher(list(registry.parameters), list(registry.assets))
+            _matcher_version = registry.version
+        return _matcher
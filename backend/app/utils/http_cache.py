@@ -0,0 +1,115 @@
+"""
+Conditional GET and pre-compressed bodies for responses derived from the registry.
+A body is serialized and compressed once per (registry version, key) and kept in a small
+LRU; its strong ETags are derived from the same pair plus the content-coding (each
+encoding is its own byte representation), so a client revalidating with If-None-Match
+gets a bodiless 304 without any server-side work. Brotli comes from the `brotli` package
+in requirements.txt; without it only gzip is served.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_SIZE = int(os.getenv("REGISTRY_RESPONSE_CACHE_SIZE", "128"))
+MIN_COMPRESS_BYTES = 512  # below this the encoding overhead outweighs the savings
+
+
+@dataclass(frozen=True)
+class CachedBody:
+    tag: str  # opaque part of the ETag, shared by every encoding
+    identity: bytes
+    encoded: dict[str, bytes]  # content-coding → compressed body
+
+    def etag(self, coding: str | None) -> str:
+        """Strong validator of one representation: "<tag>" for identity, "<tag>-gzip" / "<tag>-br"."""
+        return f'"{self.tag}-{coding}"' if coding else f'"{self.tag}"'
+
+
+def _compress(body: bytes) -> dict[str, bytes]:
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {}
+    encoded = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body, quality=11)
+    return encoded
+
+
+class ResponseCache:
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self._entries: OrderedDict[tuple[str, str], CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, version: str, key: str, build: Callable[[], object]) -> CachedBody:
+        with self._lock:
+            cached = self._entries.get((version, key))
+            if cached is not None:
+                self._entries.move_to_end((version, key))
+                return cached
+
+        body = json.dumps(build(), ensure_ascii=False, separators=(",", ":")).encode()
+        tag = hashlib.sha256(f"{version}\n{key}".encode()).hexdigest()[:24]
+        cached = CachedBody(tag, body, _compress(body))
+        with self._lock:
+            self._entries[(version, key)] = cached
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return cached
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison, so a W/ prefix on the client's copy still matches;
+    etag is the validator of the representation being selected, encoding suffix included.
+    """
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or any(t.removeprefix("W/") == etag for t in candidates)
+
+
+def choose_encoding(accept_encoding: str | None, available: dict[str, bytes]) -> str | None:
+    """Best available content-coding the client accepts (q > 0), preferring brotli."""
+    accepted: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def cached_json_response(
+    request: Request, cache: ResponseCache, version: str, key: str, build: Callable[[], object]
+) -> Response:
+    cached = cache.get_or_build(version, key, build)
+    # The validator belongs to the representation this request would get
+    coding = choose_encoding(request.headers.get("accept-encoding"), cached.encoded)
+    # no-cache: clients keep the body but revalidate each time, so a registry reload shows up at once
+    headers = {"ETag": cached.etag(coding), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if coding is None:
+        return Response(content=cached.identity, media_type="application/json", headers=headers)
+    headers["Content-Encoding"] = coding
+    return Response(content=cached.encoded[coding], media_type="application/json", headers=headers)
@@ -0,0 +1,117 @@
+"""
+Per-workbook state for incremental ingestion of append-only workbooks.
+For every sheet of a workbook identity (plant + filename, or an explicit key) it keeps the
+header signature and mapping, a watermark of data rows already ingested with a hash of
+those rows, and a content hash from the zip directory. The next upload of the same
+workbook skips unchanged sheets and parses only rows past the watermark.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from app.models.schemas import LLMMappingResponse, SheetDelta
+from app.utils.storage import DATA_DIR, connect
+
+DB_PATH = os.getenv("INGEST_STATE_PATH", str(DATA_DIR / "ingest_state.sqlite3"))
+
+
+@dataclass
+class SheetState:
+    signature: str  # hash of the normalized header row
+    header_row: int
+    mapping: LLMMappingResponse
+    rows: int  # data rows up to the last non-empty one
+    rows_hash: str  # hash of exactly those rows
+    content_hash: str | None  # zip CRCs of the sheet and the parts its values depend on
+
+
+@dataclass
+class IngestSession:
+    """One upload's view: the state it started from, and what it will leave behind."""
+
+    workbook_key: str
+    previous: dict[str, SheetState]
+    current: dict[str, SheetState] = field(default_factory=dict)
+    deltas: list[SheetDelta] = field(default_factory=list)
+
+    def record(self, sheet: str, state: SheetState | None, delta: SheetDelta) -> None:
+        """state=None leaves no state behind, so the next upload parses the sheet afresh."""
+        if state is not None:
+            self.current[sheet] = state
+        self.deltas.append(delta)
+
+
+class IngestStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._key_locks: dict[str, threading.Lock] = {}
+        self._conn = connect(self.path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_sheets ("
+            " workbook_key TEXT NOT NULL, sheet TEXT NOT NULL, signature TEXT NOT NULL,"
+            " header_row INTEGER NOT NULL, mapping TEXT NOT NULL, rows INTEGER NOT NULL,"
+            " rows_hash TEXT NOT NULL, content_hash TEXT, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (workbook_key, sheet)) WITHOUT ROWID"
+        )
+
+    def lock(self, workbook_key: str) -> threading.Lock:
+        """Uploads of one workbook are ingested one at a time, so no rows are handed out twice."""
+        with self._lock:
+            return self._key_locks.setdefault(workbook_key, threading.Lock())
+
+    def session(self, workbook_key: str) -> IngestSession:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sheet, signature, header_row, mapping, rows, rows_hash, content_hash"
+                " FROM ingest_sheets WHERE workbook_key = ?",
+                (workbook_key,),
+            ).fetchall()
+        previous = {
+            sheet: SheetState(signature, header_row, LLMMappingResponse.model_validate_json(mapping), n, h, content)
+            for sheet, signature, header_row, mapping, n, h, content in rows
+        }
+        return IngestSession(workbook_key, previous)
+
+    def commit(self, session: IngestSession) -> None:
+        """Replace the workbook's stored state with the session's, in one transaction."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM ingest_sheets WHERE workbook_key = ?", (session.workbook_key,))
+                self._conn.executemany(
+                    "INSERT INTO ingest_sheets (workbook_key, sheet, signature, header_row, mapping, rows,"
+                    " rows_hash, content_hash, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (session.workbook_key, sheet, s.signature, s.header_row, s.mapping.model_dump_json(),
+                         s.rows, s.rows_hash, s.content_hash, now)
+                        for sheet, s in session.current.items()
+                    ],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def forget(self, workbook_key: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM ingest_sheets WHERE workbook_key = ?", (workbook_key,))
+        return cursor.rowcount > 0
+
+
+_store: IngestStore | None = None
+_store_pid: int | None = None
+_store_lock = threading.Lock()
+
+
+def get_ingest_store() -> IngestStore:
+    """Process-wide store; re-created after a fork so SQLite handles are never shared."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = IngestStore()
+            _store_pid = os.getpid()
+        return _store
@@ -0,0 +1,290 @@
+"""
+Background parse jobs executed in a bounded process pool.
+The API process only keeps job metadata and finished results; the CPU-heavy parse and
+the blocking LLM call run in worker processes, so the event loop stays responsive.
+Workers report progress and observe cancellation through a multiprocessing manager.
+A workbook already in the parse cache, or identical to a job still held here, is not
+parsed again; finished results are evicted oldest first past JOB_RESULTS_MAX_MB.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.models.schemas import (
+    CellBatchRecord,
+    ColumnBatchRecord,
+    JobProgress,
+    ParseJob,
+    SheetMappingRecord,
+    SummaryRecord,
+)
+from app.utils.parse_cache import ParseResult, get_parse_cache
+from app.utils.parse_pool import disable_parallel_parse
+from app.utils.response_encoding import ROWS_JSON, encode_columnar
+
+logger = logging.getLogger(__name__)
+
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_RESULTS_MAX_BYTES = int(float(os.getenv("JOB_RESULTS_MAX_MB", "256")) * 1024 * 1024)
+FINISHED_STATES = {"succeeded", "failed", "cancelled"}
+REUSABLE_STATES = {"queued", "running", "succeeded"}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _encode(result: ParseResult, media_type: str) -> bytes:
+    if media_type == ROWS_JSON:
+        return result.model_dump_json().encode()
+    return encode_columnar(result, media_type)
+
+
+def _run_parse_job(job_id: str, path: Path, filename: str, media_type: str, shared, cancelled) -> bytes:
+    """Worker-process entry point: parse, publish progress, return the encoded response body."""
+    from app.agents.excel_parser import collect_records, iter_parse_excel
+
+    progress = {"started_at": time.time(), "sheets_done": 0, "rows_done": 0}
+    shared[job_id] = progress
+    columnar = media_type != ROWS_JSON
+
+    def tracked(source):
+        current_sheet = None
+        for record in iter_parse_excel(source, filename, columnar=columnar):
+            if cancelled.get(job_id):
+                raise JobCancelled()
+            if isinstance(record, SheetMappingRecord):
+                # Sheets are parsed one at a time, so a new mapping means the previous sheet is done
+                if current_sheet is not None:
+                    progress["sheets_done"] += 1
+                current_sheet = record.sheet
+            elif isinstance(record, CellBatchRecord):
+                progress["rows_done"] += len({c.row for c in record.cells})
+            elif isinstance(record, ColumnBatchRecord):
+                progress["rows_done"] += max((len(c.rows) for c in record.columns), default=0)
+            elif isinstance(record, SummaryRecord) and current_sheet is not None:
+                progress["sheets_done"] += 1
+            shared[job_id] = progress
+            yield record
+
+    try:
+        with open(path, "rb") as source:
+            result = collect_records(tracked(source), columnar)
+    finally:
+        path.unlink(missing_ok=True)
+    return _encode(result, media_type)
+
+
+@dataclass
+class _Job:
+    info: ParseJob
+    path: Path
+    key: str  # parse cache key plus media type: identical submissions share the job
+    future: Future | None = None
+    result: bytes | None = None
+
+
+class JobManager:
+    def __init__(
+        self, max_workers: int = PARSE_WORKERS, ttl: int = JOB_TTL_SECONDS, max_result_bytes: int = JOB_RESULTS_MAX_BYTES
+    ):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_result_bytes = max_result_bytes
+        self._jobs: dict[str, _Job] = {}
+        self._by_key: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._manager = None
+        self._progress = None
+        self._cancelled = None
+
+    def _ensure_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the API process runs threads and gRPC channels that must not be forked
+        ctx = multiprocessing.get_context("spawn")
+        if self._manager is None:
+            self._manager = ctx.Manager()
+            self._progress = self._manager.dict()
+            self._cancelled = self._manager.dict()
+        if self._pool is None:
+            # Jobs already run side by side, so each one parses its workbook in-process
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=ctx, initializer=disable_parallel_parse
+            )
+        return self._pool
+
+    def submit(self, path: Path, filename: str, media_type: str = ROWS_JSON) -> ParseJob:
+        """
+        Queue a parse of the workbook at path; the job takes ownership of the file and deletes it.
+        A workbook identical to a queued, running or succeeded job returns that job, and one
+        whose result is in the parse cache gives a job that has already succeeded.
+        """
+        from app.agents.excel_parser import parse_cache_key
+
+        with open(path, "rb") as source:
+            cache_key = parse_cache_key(source, filename, media_type != ROWS_JSON)
+        key = json.dumps([cache_key, media_type])
+        job_id = uuid.uuid4().hex
+        info = ParseJob(job_id=job_id, status="queued", filename=filename, media_type=media_type, created_at=time.time())
+        with self._lock:
+            self._purge()
+            existing = self._jobs.get(self._by_key.get(key, ""))
+            reused = existing.info.job_id if existing is not None and existing.info.status in REUSABLE_STATES else None
+            if reused is None:
+                job = _Job(info=info, path=path, key=key)
+                self._jobs[job_id] = job
+                self._by_key[key] = job_id
+                cached = get_parse_cache().get(cache_key)
+                if cached is None:
+                    job.future = self._ensure_pool().submit(
+                        _run_parse_job, job_id, path, filename, media_type, self._progress, self._cancelled
+                    )
+        if reused is not None:
+            path.unlink(missing_ok=True)
+            return self.get(reused)
+        if cached is None:
+            job.future.add_done_callback(lambda f: self._finish(job_id, f))
+            return self.get(job_id)
+
+        # Encoded outside the lock; an identical submission meanwhile finds this job queued
+        path.unlink(missing_ok=True)
+        try:
+            body, error = _encode(cached, media_type), None
+        except Exception as e:
+            body, error = None, f"Encoding failed: {str(e)}"
+        with self._lock:
+            info.started_at = info.finished_at = time.time()
+            info.status, info.error, job.result = ("succeeded" if error is None else "failed"), error, body
+            self._evict()
+        return self.get(job_id)
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if self._manager is not None:
+                self._refresh(job)  # final progress, before the status below freezes it
+            info = job.info
+            info.finished_at = time.time()
+            try:
+                job.result = future.result()
+                info.status = "succeeded"
+            except CancelledError:
+                info.status = "cancelled"
+                job.path.unlink(missing_ok=True)  # never reached a worker
+            except JobCancelled:
+                info.status = "cancelled"
+            except BrokenProcessPool as e:
+                info.status, info.error = "failed", f"Worker process died: {e}"
+                job.path.unlink(missing_ok=True)
+                self._pool = None  # recreated on the next submit
+            except Exception as e:
+                info.status, info.error = "failed", f"Parsing failed: {str(e)}"
+            if self._manager is not None:
+                self._progress.pop(job_id, None)
+                self._cancelled.pop(job_id, None)
+            self._evict()
+
+    def _refresh(self, job: _Job) -> None:
+        info = job.info
+        if info.status in FINISHED_STATES and info.started_at is not None:
+            return
+        shared = self._progress.get(info.job_id) if self._progress is not None else None
+        if shared:
+            info.started_at = shared["started_at"]
+            info.progress = JobProgress(sheets_done=shared["sheets_done"], rows_done=shared["rows_done"])
+            if info.status == "queued":
+                info.status = "running"
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.ttl
+        for job_id in [j for j, job in self._jobs.items() if job.info.finished_at and job.info.finished_at < cutoff]:
+            self._drop(job_id)
+
+    def _evict(self) -> None:
+        """Drop the oldest finished results while they exceed max_result_bytes; the newest always stays."""
+        finished = sorted((j for j in self._jobs.values() if j.result is not None), key=lambda j: j.info.finished_at)
+        total = sum(len(j.result) for j in finished)
+        for job in finished[:-1]:
+            if total <= self.max_result_bytes:
+                break
+            total -= len(job.result)
+            self._drop(job.info.job_id)
+
+    def _drop(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id)
+        if self._by_key.get(job.key) == job_id:
+            del self._by_key[job.key]
+
+    def get(self, job_id: str) -> ParseJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._refresh(job)
+            return job.info.model_copy(deep=True)
+
+    def result(self, job_id: str) -> bytes | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.result if job else None
+
+    def cancel(self, job_id: str) -> ParseJob | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.info.status not in FINISHED_STATES:
+                # Queued jobs never start; running ones stop at their next record. A job answered
+                # from the parse cache has no future and finishes on its own at once
+                if job.future is not None and not job.future.cancel():
+                    self._cancelled[job_id] = True
+        return self.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float, poll_interval: float = 0.25) -> ParseJob | None:
+        """Long-poll: return once the job has finished or the timeout elapses."""
+        deadline = time.monotonic() + timeout
+        info = self.get(job_id)
+        while info is not None and info.status not in FINISHED_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(poll_interval)
+            info = self.get(job_id)
+        return info
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+_job_manager: JobManager | None = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
+
+
+def shutdown_job_manager() -> None:
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is not None:
+            _job_manager.shutdown()
+            _job_manager = None
@@ -0,0 +1,208 @@
+"""
+Shared Gemini client for every agent.
+Models are created once and reused, so calls share the library's gRPC channel. Each call
+runs on a bounded worker pool under a hard deadline; transient provider errors are retried
+with full-jitter exponential backoff inside that deadline; a circuit breaker fails fast
+while the provider is down so callers go straight to their fallbacks; and, when enabled,
+a call still running after the observed p95 latency is hedged with a duplicate request.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
+TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP_SECONDS", "4"))
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "0") == "1"
+HEDGE_MIN_SAMPLES = 20  # latencies needed before the p95 is trusted
+
+TRANSIENT_ERRORS = (
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class LLMUnavailable(Exception):
+    """The call was not attempted (circuit open) or did not finish within its deadline."""
+
+
+class CircuitBreaker:
+    """Closed → open after N consecutive failures → half-open trial call after the reset window."""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failures = failures
+        self.reset_seconds = reset_seconds
+        self._consecutive = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self._opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if success:
+                self._consecutive = 0
+                self._opened_at = None
+                return
+            self._consecutive += 1
+            if self._opened_at is not None or self._consecutive >= self.failures:
+                if self._opened_at is None:
+                    logger.warning(f"LLM circuit opened after {self._consecutive} consecutive failures")
+                self._opened_at = time.monotonic()
+
+
+class LLMClient:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, hedge: bool = HEDGE_ENABLED):
+        self.hedge = hedge
+        self.breaker = CircuitBreaker()
+        self._models: dict[str, genai.GenerativeModel] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._latencies: deque[float] = deque(maxlen=200)
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "hedges": 0, "short_circuited": 0}
+
+    def _model(self, name: str) -> genai.GenerativeModel:
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = genai.GenerativeModel(name)
+            return model
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def p95_latency(self) -> float | None:
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def generate(self, prompt: str, *, temperature: float, model: str = MODEL, timeout: float = TIMEOUT_SECONDS):
+        """
+        generate_content with a JSON response, retried and bounded by `timeout` seconds overall.
+        Raises LLMUnavailable when the circuit is open or the deadline passes, otherwise the
+        last provider error.
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise LLMUnavailable("LLM circuit open; provider recently failing")
+
+        deadline = time.monotonic() + timeout
+        config = genai.types.GenerationConfig(temperature=temperature, response_mime_type="application/json")
+        attempt = 0
+        while True:
+            try:
+                response = self._attempt(self._model(model), prompt, config, deadline)
+            except Exception as e:
+                transient = isinstance(e, TRANSIENT_ERRORS + (LLMUnavailable,))
+                backoff = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2**attempt))
+                if transient and attempt < MAX_RETRIES and time.monotonic() + backoff < deadline:
+                    attempt += 1
+                    self._count("retries")
+                    logger.info(f"Transient LLM error ({type(e).__name__}), retry {attempt} in {backoff:.2f}s")
+                    time.sleep(backoff)
+                    continue
+                self._count("failed")
+                # Only outages trip the breaker; a rejected request still means the provider is up
+                self.breaker.record(success=not transient)
+                raise
+            self._count("succeeded")
+            self.breaker.record(success=True)
+            return response
+
+    def _attempt(self, model: genai.GenerativeModel, prompt: str, config, deadline: float):
+        def call() -> object:
+            started = time.monotonic()
+            response = model.generate_content(
+                prompt,
+                generation_config=config,
+                # Retries are ours; the gRPC timeout frees the worker when we stop waiting
+                request_options={"timeout": max(0.1, deadline - time.monotonic()), "retry": None},
+            )
+            with self._lock:
+                self._latencies.append(time.monotonic() - started)
+            return response
+
+        futures: list[Future] = [self._pool.submit(call)]
+        hedge_after = self.p95_latency() if self.hedge else None
+        if hedge_after is not None:
+            done, _ = wait(futures, timeout=min(hedge_after, max(0.0, deadline - time.monotonic())))
+            if not done and time.monotonic() < deadline:
+                self._count("hedges")
+                futures.append(self._pool.submit(call))
+
+        error: BaseException | None = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()  # first success wins; a losing hedge just finishes unseen
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise LLMUnavailable("LLM call exceeded its deadline")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["circuit"] = self.breaker.state
+        p95 = self.p95_latency()
+        stats["p95_latency_seconds"] = round(p95, 3) if p95 is not None else None
+        return stats
+
+
+_client: LLMClient | None = None
+_client_pid: int | None = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Process-wide client; re-created after a fork so worker threads and channels are never shared."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = LLMClient()
+            _client_pid = os.getpid()
+        return _client
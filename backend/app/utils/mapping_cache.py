@@ -0,0 +1,147 @@
+"""
+Two-tier cache for LLM header mappings.
+Tier 1 is an in-process LRU, tier 2 a SQLite table that survives restarts.
+Keys combine the normalized header list, the registry version and the model name,
+so a registry edit or a model switch never serves a stale mapping.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from app.models.schemas import LLMMappingResponse
+from app.utils.registry import registry_version
+from app.utils.storage import DATA_DIR, connect
+
+logger = logging.getLogger(__name__)
+
+MEMORY_SIZE = int(os.getenv("MAPPING_CACHE_MEMORY_SIZE", "256"))
+DISK_SIZE = int(os.getenv("MAPPING_CACHE_DISK_SIZE", "10000"))
+DISK_PATH = os.getenv("MAPPING_CACHE_PATH", str(DATA_DIR / "mapping_cache.sqlite3"))
+
+
+def normalize_header(header: str) -> str:
+    return " ".join(header.lower().split())
+
+
+def cache_key(headers: list[str], model: str) -> str:
+    payload = json.dumps([[normalize_header(h) for h in headers], registry_version(), model])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MappingCache:
+    def __init__(self, memory_size: int = MEMORY_SIZE, disk_size: int = DISK_SIZE, disk_path: str = DISK_PATH):
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+        if disk_path and disk_size > 0:
+            try:
+                self._conn = connect(Path(disk_path))
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS mapping_cache ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_mapping_cache_last_used ON mapping_cache (last_used)")
+            except Exception as e:
+                logger.warning(f"Mapping cache disk tier unavailable, using memory only: {e}")
+                self._conn = None
+
+    def get(self, headers: list[str], model: str) -> LLMMappingResponse | None:
+        key = cache_key(headers, model)
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+            elif self._conn is not None:
+                row = self._conn.execute("SELECT value FROM mapping_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = row[0]
+                    self._conn.execute("UPDATE mapping_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._remember(key, value)
+                    self._counters["disk_hits"] += 1
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+
+        result = LLMMappingResponse.model_validate_json(value)
+        # Headers only match after normalization, so report them as they appear in this sheet
+        for mapping in result.mappings:
+            if 0 <= mapping.col_index < len(headers):
+                mapping.original_header = headers[mapping.col_index]
+        return result
+
+    def put(self, headers: list[str], model: str, result: LLMMappingResponse) -> None:
+        key = cache_key(headers, model)
+        value = result.model_dump_json()
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is None:
+                return
+            now = time.time()
+            # A failed write only costs a future disk hit; the mapping itself is still good
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO mapping_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM mapping_cache").fetchone()
+                if count > self.disk_size:
+                    self._conn.execute(
+                        "DELETE FROM mapping_cache WHERE key IN"
+                        " (SELECT key FROM mapping_cache ORDER BY last_used LIMIT ?)",
+                        (count - self.disk_size,),
+                    )
+                    self._counters["disk_evictions"] += count - self.disk_size
+            except sqlite3.Error as e:
+                logger.warning(f"Mapping cache write failed, kept in memory only: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM mapping_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = (
+                self._conn.execute("SELECT COUNT(*) FROM mapping_cache").fetchone()[0] if self._conn else 0
+            )
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, value: str) -> None:
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self._counters["memory_evictions"] += 1
+
+
+_cache: MappingCache | None = None
+_cache_pid: int | None = None
+_cache_lock = threading.Lock()
+
+
+def get_mapping_cache() -> MappingCache:
+    """Process-wide cache instance; re-created after a fork so SQLite handles are never shared."""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = MappingCache()
+            _cache_pid = os.getpid()
+        return _cache
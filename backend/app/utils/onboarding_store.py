@@ -0,0 +1,241 @@
+"""
+Durable store for submitted onboarding configurations.
+Plants, assets, parameters and formulas live in separate SQLite tables (WAL mode), keyed by
+plant id and indexed on asset and parameter names so "which plants use X" is an index scan.
+Each submission, or batch of submissions, is written in one transaction with executemany.
+Reads go through per-thread connections so they never wait behind a writer.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from app.models.schemas import (
+    AssetConfig,
+    FormulaConfig,
+    OnboardingConfig,
+    ParameterConfig,
+    PlantInfo,
+    PlantPage,
+    PlantSummary,
+    StoredOnboarding,
+)
+from app.utils.storage import DATA_DIR, connect
+
+DB_PATH = os.getenv("ONBOARDING_DB_PATH", str(DATA_DIR / "onboarding.sqlite3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plants (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    address TEXT NOT NULL,
+    manager_email TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS plant_assets (
+    plant_id INTEGER NOT NULL REFERENCES plants (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    display_name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (plant_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS plant_parameters (
+    plant_id INTEGER NOT NULL REFERENCES plants (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    display_name TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    category TEXT NOT NULL,
+    section TEXT NOT NULL,
+    applicable_assets TEXT NOT NULL,
+    PRIMARY KEY (plant_id, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS plant_formulas (
+    plant_id INTEGER NOT NULL REFERENCES plants (id) ON DELETE CASCADE,
+    parameter TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    expression TEXT NOT NULL,
+    depends_on TEXT NOT NULL,
+    PRIMARY KEY (plant_id, parameter)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_plants_name ON plants (name);
+CREATE INDEX IF NOT EXISTS idx_plant_assets_name ON plant_assets (name, plant_id);
+CREATE INDEX IF NOT EXISTS idx_plant_assets_type ON plant_assets (type, plant_id);
+CREATE INDEX IF NOT EXISTS idx_plant_parameters_name ON plant_parameters (name, plant_id);
+CREATE INDEX IF NOT EXISTS idx_plant_formulas_parameter ON plant_formulas (parameter, plant_id);
+"""
+
+_SUMMARY_COLUMNS = (
+    "p.id, p.name, p.address, p.created_at,"
+    " (SELECT COUNT(*) FROM plant_assets a WHERE a.plant_id = p.id),"
+    " (SELECT COUNT(*) FROM plant_parameters m WHERE m.plant_id = p.id)"
+)
+
+
+def _summary(row: tuple) -> PlantSummary:
+    return PlantSummary(
+        id=row[0], name=row[1], address=row[2], created_at=row[3], asset_count=row[4], parameter_count=row[5]
+    )
+
+
+def duplicate_names(config: OnboardingConfig) -> list[str]:
+    """Asset, parameter and formula names that appear more than once in config."""
+    duplicates = []
+    for kind, names in (
+        ("asset", [a.name for a in config.assets]),
+        ("parameter", [p.name for p in config.parameters]),
+        ("formula", [f.parameter for f in config.formulas]),
+    ):
+        seen: set[str] = set()
+        for name in names:
+            if name in seen:
+                duplicates.append(f"{kind} '{name}'")
+            seen.add(name)
+    return duplicates
+
+
+class OnboardingStore:
+    def __init__(self, path: str = DB_PATH):
+        self.path = Path(path)
+        self._write_lock = threading.Lock()
+        self._writer = connect(self.path)
+        self._writer.execute("PRAGMA foreign_keys=ON")
+        self._writer.executescript(_SCHEMA)
+        self._local = threading.local()
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        return conn
+
+    def save(self, config: OnboardingConfig) -> int:
+        return self.save_many([config])[0]
+
+    def save_many(self, configs: list[OnboardingConfig]) -> list[int]:
+        """
+        Insert configurations in a single transaction; returns their plant ids in order.
+        A repeated asset, parameter or formula name within one configuration raises
+        sqlite3.IntegrityError and nothing is written (see duplicate_names).
+        """
+        now = time.time()
+        ids: list[int] = []
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for config in configs:
+                    plant = config.plant
+                    cursor = conn.execute(
+                        "INSERT INTO plants (name, description, address, manager_email, created_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (plant.name, plant.description, plant.address, plant.manager_email, now),
+                    )
+                    plant_id = cursor.lastrowid
+                    ids.append(plant_id)
+                    conn.executemany(
+                        "INSERT INTO plant_assets (plant_id, name, position, display_name, type)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        [(plant_id, a.name, i, a.display_name, a.type) for i, a in enumerate(config.assets)],
+                    )
+                    conn.executemany(
+                        "INSERT INTO plant_parameters"
+                        " (plant_id, name, position, display_name, unit, category, section, applicable_assets)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (plant_id, p.name, i, p.display_name, p.unit, p.category, p.section,
+                             json.dumps(p.applicable_assets))
+                            for i, p in enumerate(config.parameters)
+                        ],
+                    )
+                    conn.executemany(
+                        "INSERT INTO plant_formulas (plant_id, parameter, position, expression, depends_on)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (plant_id, f.parameter, i, f.expression, json.dumps(f.depends_on))
+                            for i, f in enumerate(config.formulas)
+                        ],
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return ids
+
+    def get(self, plant_id: int) -> StoredOnboarding | None:
+        conn = self._reader()
+        row = conn.execute(
+            "SELECT name, description, address, manager_email, created_at FROM plants WHERE id = ?", (plant_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        assets = conn.execute(
+            "SELECT name, display_name, type FROM plant_assets WHERE plant_id = ? ORDER BY position", (plant_id,)
+        ).fetchall()
+        parameters = conn.execute(
+            "SELECT name, display_name, unit, category, section, applicable_assets"
+            " FROM plant_parameters WHERE plant_id = ? ORDER BY position",
+            (plant_id,),
+        ).fetchall()
+        formulas = conn.execute(
+            "SELECT parameter, expression, depends_on FROM plant_formulas WHERE plant_id = ? ORDER BY position",
+            (plant_id,),
+        ).fetchall()
+        config = OnboardingConfig(
+            plant=PlantInfo(name=row[0], description=row[1], address=row[2], manager_email=row[3]),
+            assets=[AssetConfig(name=n, display_name=d, type=t) for n, d, t in assets],
+            parameters=[
+                ParameterConfig(
+                    name=n, display_name=d, unit=u, category=c, section=s, applicable_assets=json.loads(a)
+                )
+                for n, d, u, c, s, a in parameters
+            ],
+            formulas=[FormulaConfig(parameter=p, expression=e, depends_on=json.loads(d)) for p, e, d in formulas],
+        )
+        return StoredOnboarding(id=plant_id, created_at=row[4], config=config)
+
+    def list_plants(self, limit: int = 50, after: int = 0) -> PlantPage:
+        """Plants in id order; pass the previous page's next_after to continue (keyset pagination)."""
+        rows = self._reader().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM plants p WHERE p.id > ? ORDER BY p.id LIMIT ?", (after, limit + 1)
+        ).fetchall()
+        return self._page(rows, limit)
+
+    def plants_using_parameter(self, parameter: str, limit: int = 50, after: int = 0) -> PlantPage:
+        rows = self._reader().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM plant_parameters x JOIN plants p ON p.id = x.plant_id"
+            " WHERE x.name = ? AND x.plant_id > ? ORDER BY x.plant_id LIMIT ?",
+            (parameter, after, limit + 1),
+        ).fetchall()
+        return self._page(rows, limit)
+
+    def plants_with_asset(self, asset: str, limit: int = 50, after: int = 0) -> PlantPage:
+        rows = self._reader().execute(
+            f"SELECT {_SUMMARY_COLUMNS} FROM plant_assets x JOIN plants p ON p.id = x.plant_id"
+            " WHERE x.name = ? AND x.plant_id > ? ORDER BY x.plant_id LIMIT ?",
+            (asset, after, limit + 1),
+        ).fetchall()
+        return self._page(rows, limit)
+
+    @staticmethod
+    def _page(rows: list[tuple], limit: int) -> PlantPage:
+        items = [_summary(r) for r in rows[:limit]]
+        return PlantPage(items=items, next_after=items[-1].id if len(rows) > limit else None)
+
+
+_store: OnboardingStore | None = None
+_store_pid: int | None = None
+_store_lock = threading.Lock()
+
+
+def get_onboarding_store() -> OnboardingStore:
+    """Process-wide store; re-created after a fork so SQLite handles are never shared."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = OnboardingStore()
+            _store_pid = os.getpid()
+        return _store
@@ -0,0 +1,167 @@
+"""
+Content-addressed cache for whole-workbook parse results.
+Keys are the SHA-256 of the workbook bytes plus the registry version, the model and the
+response layout, so a re-upload of the same file is answered without opening it. Entries
+are evicted least-recently-used once their estimated in-memory size passes PARSE_CACHE_MAX_MB.
+Identical parses that overlap in time run once; later callers wait for the first one.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import BinaryIO
+
+from app.models.schemas import ColumnarParseResponse, LLMUsage, ParseResponse
+from app.utils.registry import registry_version
+
+MAX_BYTES = int(float(os.getenv("PARSE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bytes a cached result holds per parsed value, measured with tracemalloc on the benchmark
+# workbooks: a ParsedCell (or UnmappedColumn) model is ~1.2 KB, a columnar row/value pair ~70 B
+MODEL_BYTES = 1200
+COLUMN_VALUE_BYTES = 72
+
+ParseResult = ParseResponse | ColumnarParseResponse
+
+
+def workbook_digest(source: bytes | BinaryIO) -> str:
+    """SHA-256 of the workbook; a file is read from its current position and rewound."""
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    start = source.tell()
+    digest = hashlib.sha256()
+    while chunk := source.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    source.seek(start)
+    return digest.hexdigest()
+
+
+def cache_key(digest: str, model: str, columnar: bool, reader: str = "") -> str:
+    """
+    reader is workbook_readers.reader_identity(filename): the same bytes named .csv and .tsv
+    are different parses, and so are january.csv and february.csv, whose sheets are named
+    after the file.
+    """
+    return json.dumps([digest, registry_version(), model, "columnar" if columnar else "rows", reader])
+
+
+class ParseCache:
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[ParseResult, int]] = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "coalesced": 0, "misses": 0, "evictions": 0}
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], ParseResult], cacheable: Callable[[ParseResult], bool]
+    ) -> ParseResult:
+        """
+        The cached result for key, or compute() run once for every concurrent caller.
+        Results failing cacheable() are shared with waiting callers but not stored;
+        an exception reaches every caller that waited on the computation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return _free(entry[0])
+            pending = self._inflight.get(key)
+            if pending is None:
+                pending = self._inflight[key] = Future()
+                self._counters["misses"] += 1
+                owner = True
+            else:
+                self._counters["coalesced"] += 1
+                owner = False
+
+        if not owner:
+            return _free(pending.result())
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+
+        size = footprint(result) if cacheable(result) else None
+        with self._lock:
+            del self._inflight[key]
+            if size is not None and size <= self.max_bytes:
+                self._store(key, result, size)
+        pending.set_result(result)
+        return result
+
+    def get(self, key: str) -> ParseResult | None:
+        """The cached result for key, if any, without computing or waiting for it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+        return _free(entry[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._size
+            stats["in_flight"] = len(self._inflight)
+        lookups = stats["hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _store(self, key: str, result: ParseResult, size: int) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[1]
+        self._entries[key] = (result, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted
+            self._counters["evictions"] += 1
+
+
+def footprint(result: ParseResult) -> int:
+    """Estimated memory held by result; its JSON is several times smaller than its objects."""
+    if isinstance(result, ColumnarParseResponse):
+        values = sum(len(c.rows) for c in result.columns) * COLUMN_VALUE_BYTES
+    else:
+        values = len(result.parsed_data) * MODEL_BYTES
+    strings = sum(sys.getsizeof(s) for s in result.warnings) + sum(sys.getsizeof(s) for s in result.duplicate_flags)
+    return values + len(result.unmapped_columns) * MODEL_BYTES + strings
+
+
+def _free(result: ParseResult) -> ParseResult:
+    """A served copy reports no LLM usage: only the computing request spent tokens."""
+    return result.model_copy(update={"llm_usage": LLMUsage()})
+
+
+_cache: ParseCache | None = None
+_cache_pid: int | None = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """Process-wide cache instance; re-created after a fork so in-flight futures are never shared."""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = ParseCache()
+            _cache_pid = os.getpid()
+        return _cache
@@ -0,0 +1,82 @@
+"""
+Process pool that parses the sheets of one large workbook on every core.
+Workers re-open the workbook from a temporary copy and parse whole sheets, or row ranges
+of long ones, with the mappings resolved in the API process; excel_parser merges their
+records back in workbook order. Background job workers parse in-process instead, since
+the job pool already keeps the cores busy.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO
+
+from app.utils.uploads import UPLOAD_TMP_DIR
+
+# Cores this process may run on (a container's CPU set), not the host's
+_CORES = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+PARALLEL_PARSE_WORKERS = int(os.getenv("PARALLEL_PARSE_WORKERS", str(_CORES)))
+PARALLEL_PARSE_MIN_ROWS = int(os.getenv("PARALLEL_PARSE_MIN_ROWS", "20000"))
+
+_enabled = True
+
+
+def disable_parallel_parse() -> None:
+    """Process initializer for workers that must parse in-process (job and parse pool workers)."""
+    global _enabled
+    _enabled = False
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> ProcessPoolExecutor | None:
+    """Process-wide pool, re-created after a fork; None when parallel parsing is off here."""
+    global _pool, _pool_pid
+    if not _enabled or PARALLEL_PARSE_WORKERS < 2:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # spawn, not fork: the API process runs threads and gRPC channels that must not be forked
+            _pool = ProcessPoolExecutor(
+                max_workers=PARALLEL_PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=disable_parallel_parse,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the pool, at app shutdown or once a worker died; the next parse starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def copy_workbook(source: bytes | BinaryIO, start: int, suffix: str) -> Path:
+    """
+    Write the workbook to a named temp file worker processes can open; the caller deletes it.
+    A file source is copied from start and left at the position it had.
+    """
+    with tempfile.NamedTemporaryFile(suffix=suffix, dir=UPLOAD_TMP_DIR, delete=False) as tmp:
+        try:
+            if isinstance(source, bytes):
+                tmp.write(source)
+            else:
+                position = source.tell()
+                source.seek(start)
+                shutil.copyfileobj(source, tmp)
+                source.seek(position)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return Path(tmp.name)
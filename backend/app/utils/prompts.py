@@ -0,0 +1,141 @@
+"""
+Prompt builders for the Gemini calls, plus token and cost accounting.
+Each prompt is a registry-derived prefix that is built once per registry version and is
+byte-identical across requests (so provider-side prefix caching can reuse it), followed
+by the per-request part. The registry is encoded as one `|`-separated line per entry
+instead of indented JSON, which roughly halves its token count.
+"""
+import json
+import logging
+import os
+import threading
+
+from app.models.schemas import LLMUsage
+from app.utils.registry import Registry, get_registry
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens; defaults are gemini-1.5-flash list prices for prompts up to 128k tokens
+INPUT_COST_PER_MTOK = float(os.getenv("LLM_INPUT_COST_PER_MTOK", "0.075"))
+OUTPUT_COST_PER_MTOK = float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", "0.30"))
+CACHED_INPUT_COST_PER_MTOK = float(os.getenv("LLM_CACHED_INPUT_COST_PER_MTOK", "0.01875"))
+
+
+def _spelled_out(name: str, display_name: str) -> bool:
+    return display_name.lower() == name.replace("_", " ").lower()
+
+
+def _parameter_lines(registry: Registry, column: str) -> str:
+    # The display name is dropped when it only spells out the name ("coal_consumption" / "Coal Consumption")
+    return "\n".join(
+        f"{p['name']}|{'' if _spelled_out(p['name'], p['display_name']) else p['display_name']}|{p[column]}"
+        for p in registry.parameters
+    )
+
+
+def _asset_lines(registry: Registry) -> str:
+    return "\n".join(f"{a['name']}|{a['display_name']}|{a['type']}" for a in registry.assets)
+
+
+def _mapping_prefix(registry: Registry) -> str:
+    return f"""You are an expert industrial data analyst for an ESG platform called LatSpace.
+Map Excel column headers from a factory data spreadsheet to our canonical parameter registry.
+
+## Parameter Registry (name|display name, empty when it just spells out the name|unit)
+{_parameter_lines(registry, "unit")}
+
+## Asset Registry (name|display name|type)
+{_asset_lines(registry)}
+
+## Task
+For EACH header below, determine:
+1. Which parameter from the registry it maps to (or null if unmapped)
+2. Which asset it refers to (or null if none/plant-level)
+3. Confidence level: "high" (exact/near-exact), "medium" (reasonable guess), "low" (unclear)
+4. Brief reasoning (at most 10 words)
+
+Rules:
+- Be aggressive about fuzzy matching: "Coal Used (MT)" → coal_consumption, "COAL CONSMPTN" → coal_consumption
+- Detect embedded asset names: "Coal Consumption AFBC-1" → param=coal_consumption, asset=AFBC-1
+- "Steam (Boiler 2)" → param=steam_generation, asset=AFBC-2 (Boiler 2 = AFBC-2)
+- "Power TG1" → param=power_generation, asset=TG-1
+- Generic columns like "Date", "Day", "Comments", "Sr No" → unmapped (null param)
+
+## Output Format
+Return ONLY valid JSON, no markdown, one entry per header, e.g.:
+{{"mappings":[{{"col_index":0,"param_name":"coal_consumption","asset_name":"AFBC-1","confidence":"high","reasoning":"Exact name with asset suffix"}}]}}
+
+## Headers (column index: header)
+"""
+
+
+def _suggestion_prefix(registry: Registry) -> str:
+    return f"""You are an industrial ESG consultant helping configure a factory monitoring system.
+
+## Available parameters (name|display name, empty when it just spells out the name|section)
+{_parameter_lines(registry, "section")}
+
+Based on the plant description and asset types below, suggest which parameters are MOST RELEVANT to enable.
+Consider: what equipment is present, what energy sources are likely, what emissions to track.
+
+Return ONLY valid JSON (no markdown):
+{{"suggested_parameter_names":["coal_consumption","steam_generation"],"reasoning":"Brief explanation of why these parameters were selected"}}
+
+## Plant
+"""
+
+
+_prefixes: dict[str, tuple[str, str]] = {}
+_prefixes_lock = threading.Lock()
+
+
+def _prefixes_for(registry: Registry) -> tuple[str, str]:
+    """(mapping prefix, suggestion prefix) for this registry version, built on first use."""
+    prefixes = _prefixes.get(registry.version)
+    if prefixes is None:
+        with _prefixes_lock:
+            prefixes = _prefixes.get(registry.version)
+            if prefixes is None:
+                prefixes = (_mapping_prefix(registry), _suggestion_prefix(registry))
+                _prefixes.clear()  # only the current version is ever requested again
+                _prefixes[registry.version] = prefixes
+    return prefixes
+
+
+def build_mapping_prompt(headers: list[str], sheet_name: str = "Sheet1") -> str:
+    prefix, _ = _prefixes_for(get_registry())
+    lines = "\n".join(f"{i}: {json.dumps(h, ensure_ascii=False)}" for i, h in enumerate(headers))
+    return f'{prefix}Sheet "{sheet_name}":\n{lines}'
+
+
+def build_suggestion_prompt(plant_description: str, asset_types: list[str]) -> str:
+    _, prefix = _prefixes_for(get_registry())
+    return f"{prefix}- Description: {plant_description}\n- Asset types present: {', '.join(asset_types)}"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough count for when the provider reports no usage (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def usage_from_response(response, prompt: str) -> LLMUsage:
+    """Token counts and estimated cost of one generate_content call."""
+    metadata = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+    output_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+    cached_tokens = getattr(metadata, "cached_content_token_count", 0) or 0
+    if not input_tokens:
+        input_tokens = estimate_tokens(prompt)
+        output_tokens = estimate_tokens(getattr(response, "text", "") or "")
+    cost = (
+        (input_tokens - cached_tokens) * INPUT_COST_PER_MTOK
+        + cached_tokens * CACHED_INPUT_COST_PER_MTOK
+        + output_tokens * OUTPUT_COST_PER_MTOK
+    ) / 1_000_000
+    return LLMUsage(
+        calls=1,
+        input_tokens=input_tokens,
+        output_tokens=output_tokens,
+        cached_input_tokens=cached_tokens,
+        estimated_cost_usd=round(cost, 8),
+    )
@@ -1,34 +1,136 @@
-"""Loads and exposes the parameter and asset registries."""
+"""
+Loads and exposes the parameter and asset registries.
+Both files are parsed once into an immutable, indexed Registry snapshot. The files' mtimes
+are re-checked at most every REGISTRY_RELOAD_INTERVAL seconds; on a change a new snapshot
+is built and swapped in whole, so readers always see one consistent version.
+"""
+import hashlib
 import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
+
+logger = logging.getLogger(__name__)
 
 REGISTRY_DIR = Path(__file__).parent.parent.parent / "registry"
+RELOAD_INTERVAL = float(os.getenv("REGISTRY_RELOAD_INTERVAL", "1.0"))
+_FILES = ("parameters.json", "assets.json")
+
+
+@dataclass(frozen=True)
+class Registry:
+    """
+    One version of the registry. Records are the dicts from the JSON files and are shared
+    by every caller, so treat them as read-only.
+    """
+
+    version: str
+    parameters: tuple[dict, ...]
+    assets: tuple[dict, ...]
+    parameters_by_name: Mapping[str, dict]
+    assets_by_name: Mapping[str, dict]
+    assets_by_type: Mapping[str, tuple[dict, ...]]  # lower-cased asset type → assets
+    parameters_by_asset: Mapping[str, tuple[dict, ...]]  # asset name → applicable parameters
+    applicable_assets: Mapping[str, frozenset[str]]  # parameter name → asset names
+
+    @classmethod
+    def build(cls, parameters: list[dict], assets: list[dict], version: str) -> "Registry":
+        assets_by_type: dict[str, list[dict]] = {}
+        for a in assets:
+            assets_by_type.setdefault(a["type"].lower(), []).append(a)
+        parameters_by_asset: dict[str, list[dict]] = {}
+        for p in parameters:
+            for asset_name in p.get("applicable_assets", []):
+                parameters_by_asset.setdefault(asset_name, []).append(p)
+        return cls(
+            version=version,
+            parameters=tuple(parameters),
+            assets=tuple(assets),
+            parameters_by_name=MappingProxyType({p["name"]: p for p in parameters}),
+            assets_by_name=MappingProxyType({a["name"]: a for a in assets}),
+            assets_by_type=MappingProxyType({t: tuple(v) for t, v in assets_by_type.items()}),
+            parameters_by_asset=MappingProxyType({a: tuple(v) for a, v in parameters_by_asset.items()}),
+            applicable_assets=MappingProxyType(
+                {p["name"]: frozenset(p.get("applicable_assets", [])) for p in parameters}
+            ),
+        )
+
+    def parameters_for_asset_types(self, asset_types: list[str]) -> list[dict]:
+        """Parameters applicable to any asset of the given types, in registry order."""
+        names = {
+            p["name"]
+            for t in asset_types
+            for a in self.assets_by_type.get(t.strip().lower(), ())
+            for p in self.parameters_by_asset.get(a["name"], ())
+        }
+        return [p for p in self.parameters if p["name"] in names]
+
+
+_registry: Registry | None = None
+_registry_stamp: tuple | None = None
+_checked_at = 0.0
+_registry_lock = threading.Lock()
+
+
+def _stamp() -> tuple:
+    return tuple((s.st_mtime_ns, s.st_size) for s in (os.stat(REGISTRY_DIR / f) for f in _FILES))
+
+
+def _load() -> Registry:
+    raw = [(REGISTRY_DIR / f).read_bytes() for f in _FILES]
+    digest = hashlib.sha256()
+    for content in raw:
+        digest.update(content)
+    return Registry.build(json.loads(raw[0]), json.loads(raw[1]), digest.hexdigest()[:16])
+
+
+def get_registry() -> Registry:
+    """Current registry snapshot, reloaded when either file's mtime or size changes."""
+    global _registry, _registry_stamp, _checked_at
+    now = time.monotonic()
+    if _registry is not None and now - _checked_at < RELOAD_INTERVAL:
+        return _registry
+    with _registry_lock:
+        stamp = _stamp()
+        if _registry is None or stamp != _registry_stamp:
+            try:
+                _registry = _load()
+                _registry_stamp = stamp
+            except (OSError, ValueError) as e:
+                if _registry is None:
+                    raise
+                # Most likely caught mid-write; keep serving the last good version and retry
+                logger.warning(f"Registry reload failed, keeping version {_registry.version}: {e}")
+        _checked_at = now
+        return _registry
 
 
 def load_parameters() -> list[dict]:
-    with open(REGISTRY_DIR / "parameters.json") as f:
-        return json.load(f)
+    return list(get_registry().parameters)
 
 
 def load_assets() -> list[dict]:
-    with open(REGISTRY_DIR / "assets.json") as f:
-        return json.load(f)
+    return list(get_registry().assets)
+
+
+def registry_version() -> str:
+    """Short content hash of both registry files; changes whenever either file changes."""
+    return get_registry().version
 
 
 def get_parameter_names() -> list[str]:
-    return [p["name"] for p in load_parameters()]
+    return list(get_registry().parameters_by_name)
 
 
 def get_asset_names() -> list[str]:
-    return [a["name"] for a in load_assets()]
+    return list(get_registry().assets_by_name)
 
 
 def get_parameters_by_asset_types(asset_types: list[str]) -> list[dict]:
     """Filter parameters applicable to the given asset types."""
-    assets = load_assets()
-    asset_names_of_type = {a["name"] for a in assets if a["type"] in asset_types}
-    params = load_parameters()
-    return [
-        p for p in params
-        if any(a in asset_names_of_type for a in p.get("applicable_assets", []))
-    ]
\ No newline at end of file
+    return get_registry().parameters_for_asset_types(asset_types)
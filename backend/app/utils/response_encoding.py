@@ -0,0 +1,89 @@
+"""
+Content negotiation and encoders for the columnar Track A response.
+JSON is always available; MessagePack and Arrow IPC need the optional
+`msgpack` / `pyarrow` packages and are refused with 406 when they are missing.
+"""
+import json
+
+from fastapi import HTTPException
+
+from app.models.schemas import ColumnarParseResponse
+
+ROWS_JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.latspace.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+FORMATS = {
+    "rows": ROWS_JSON,
+    "columnar": COLUMNAR_JSON,
+    "msgpack": MSGPACK,
+    "arrow": ARROW_STREAM,
+}
+_ACCEPT_ALIASES = {
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    ARROW_STREAM: ARROW_STREAM,
+}
+
+
+def negotiate(format: str | None, accept: str | None) -> str:
+    """Pick the response media type: explicit ?format= wins, then the Accept header, then row JSON."""
+    if format:
+        if format not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown format '{format}'. Use one of: {', '.join(FORMATS)}.")
+        return FORMATS[format]
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in _ACCEPT_ALIASES:
+            return _ACCEPT_ALIASES[media_type]
+    return ROWS_JSON
+
+
+def _metadata(result: ColumnarParseResponse) -> dict:
+    return {
+        "status": result.status,
+        "header_row": result.header_row,
+        "unmapped_columns": [u.model_dump() for u in result.unmapped_columns],
+        "warnings": result.warnings,
+        "duplicate_flags": result.duplicate_flags,
+        "llm_usage": result.llm_usage.model_dump(),
+    }
+
+
+def encode_columnar(result: ColumnarParseResponse, media_type: str) -> bytes:
+    if media_type == COLUMNAR_JSON:
+        return result.model_dump_json().encode()
+
+    if media_type == MSGPACK:
+        try:
+            import msgpack
+        except ImportError:
+            raise HTTPException(status_code=406, detail="MessagePack output requires the 'msgpack' package.")
+        return msgpack.packb(result.model_dump(), use_bin_type=True)
+
+    if media_type == ARROW_STREAM:
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise HTTPException(status_code=406, detail="Arrow output requires the 'pyarrow' package.")
+        # One Arrow row per mapped column; response-level fields travel in the schema metadata
+        columns = result.columns
+        table = pa.table(
+            {
+                "sheet": pa.array([c.sheet for c in columns], pa.string()).dictionary_encode(),
+                "col": pa.array([c.col for c in columns], pa.int32()),
+                "param_name": pa.array([c.param_name for c in columns], pa.string()),
+                "asset_name": pa.array([c.asset_name for c in columns], pa.string()),
+                "confidence": pa.array([c.confidence for c in columns], pa.string()).dictionary_encode(),
+                "rows": pa.array([c.rows for c in columns], pa.list_(pa.int32())),
+                "values": pa.array([c.values for c in columns], pa.list_(pa.float64())),
+            }
+        ).replace_schema_metadata({"latspace": json.dumps(_metadata(result))})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    raise ValueError(f"Not a columnar media type: {media_type}")
@@ -0,0 +1,15 @@
+"""Local on-disk storage shared by the backend's caches and stores."""
+import os
+import sqlite3
+from pathlib import Path
+
+DATA_DIR = Path(os.getenv("LATSPACE_DATA_DIR", Path(__file__).parent.parent.parent / "data"))
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open a SQLite database in WAL mode, safe to share across threads behind a lock."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
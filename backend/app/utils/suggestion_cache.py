@@ -0,0 +1,228 @@
+"""
+Cache for AI parameter suggestions.
+An exact hit needs the same normalized asset-type set and description. Failing that, a
+TF-IDF index over past descriptions with the same asset types serves the closest stored
+suggestion when its cosine similarity clears SUGGESTION_SIMILARITY_THRESHOLD. Entries live
+in memory and in SQLite, expire after SUGGESTION_CACHE_TTL_SECONDS, and are scoped to the
+registry version and model like the mapping cache. The memory tier keeps at most
+SUGGESTION_CACHE_MEMORY_SIZE entries, least recently used evicted first.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.models.schemas import AISuggestionResponse, LLMUsage
+from app.utils.registry import registry_version
+from app.utils.storage import DATA_DIR, connect
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = float(os.getenv("SUGGESTION_SIMILARITY_THRESHOLD", "0.8"))
+MEMORY_SIZE = int(os.getenv("SUGGESTION_CACHE_MEMORY_SIZE", "1024"))
+TTL_SECONDS = int(os.getenv("SUGGESTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DISK_PATH = os.getenv("SUGGESTION_CACHE_PATH", str(DATA_DIR / "suggestion_cache.sqlite3"))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_description(description: str) -> str:
+    return " ".join(_WORD_RE.findall(description.lower()))
+
+
+def normalize_asset_types(asset_types: list[str]) -> str:
+    return ",".join(sorted({t.strip().lower() for t in asset_types if t.strip()}))
+
+
+@dataclass
+class _Entry:
+    key: str
+    scope: str  # asset types + registry version + model; only entries in one scope are comparable
+    terms: Counter
+    value: str
+    created_at: float
+
+
+class SuggestionCache:
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl: int = TTL_SECONDS,
+        memory_size: int = MEMORY_SIZE,
+        disk_path: str = DISK_PATH,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.memory_size = memory_size
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._postings: dict[tuple[str, str], set[str]] = {}  # (scope, term) → keys
+        self._doc_freq: dict[str, Counter] = {}  # scope → term → number of entries
+        self._scope_sizes: Counter = Counter()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "expired": 0, "memory_evictions": 0}
+
+        if disk_path:
+            try:
+                self._conn = connect(Path(disk_path))
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS suggestion_cache ("
+                    " key TEXT PRIMARY KEY, scope TEXT NOT NULL, description TEXT NOT NULL,"
+                    " value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.execute("DELETE FROM suggestion_cache WHERE created_at < ?", (time.time() - ttl,))
+                # Oldest first, so the newest entries are the ones left in memory
+                for key, scope, description, value, created_at in self._conn.execute(
+                    "SELECT key, scope, description, value, created_at FROM suggestion_cache"
+                    " ORDER BY created_at DESC LIMIT ?",
+                    (max(memory_size, 0),),
+                ).fetchall()[::-1]:
+                    self._index(_Entry(key, scope, Counter(description.split()), value, created_at))
+            except Exception as e:
+                logger.warning(f"Suggestion cache disk tier unavailable, using memory only: {e}")
+                self._conn = None
+
+    @staticmethod
+    def _scope(asset_types: list[str], model: str) -> str:
+        return json.dumps([normalize_asset_types(asset_types), registry_version(), model])
+
+    @staticmethod
+    def _key(scope: str, description: str) -> str:
+        return hashlib.sha256(f"{scope}\n{description}".encode()).hexdigest()
+
+    def get(self, description: str, asset_types: list[str], model: str) -> AISuggestionResponse | None:
+        scope = self._scope(asset_types, model)
+        normalized = normalize_description(description)
+        with self._lock:
+            entry = self._entries.get(self._key(scope, normalized))
+            if entry is not None and not self._expired(entry):
+                self._entries.move_to_end(entry.key)
+                self._counters["exact_hits"] += 1
+                return AISuggestionResponse.model_validate_json(entry.value)
+
+            best, score = self._most_similar(scope, Counter(normalized.split()))
+            if best is not None and score >= self.threshold:
+                self._entries.move_to_end(best.key)
+                self._counters["similar_hits"] += 1
+                logger.info(f"Serving a stored suggestion for a similar description (similarity {score:.2f})")
+                return AISuggestionResponse.model_validate_json(best.value)
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, description: str, asset_types: list[str], model: str, result: AISuggestionResponse) -> None:
+        scope = self._scope(asset_types, model)
+        normalized = normalize_description(description)
+        # Usage belongs to the call that produced the answer; a cache hit costs nothing
+        value = result.model_copy(update={"llm_usage": LLMUsage()}).model_dump_json()
+        entry = _Entry(self._key(scope, normalized), scope, Counter(normalized.split()), value, time.time())
+        with self._lock:
+            if self.memory_size > 0:
+                self._index(entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO suggestion_cache (key, scope, description, value, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (entry.key, scope, normalized, value, entry.created_at),
+                )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._doc_freq.clear()
+            self._scope_sizes.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM suggestion_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["exact_hits"] + stats["similar_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _expired(self, entry: _Entry) -> bool:
+        if time.time() - entry.created_at <= self.ttl:
+            return False
+        self._unindex(entry)
+        self._counters["expired"] += 1
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM suggestion_cache WHERE key = ?", (entry.key,))
+        return True
+
+    def _index(self, entry: _Entry) -> None:
+        previous = self._entries.get(entry.key)
+        if previous is not None:
+            self._unindex(previous)
+        self._entries[entry.key] = entry
+        self._scope_sizes[entry.scope] += 1
+        self._doc_freq.setdefault(entry.scope, Counter()).update(entry.terms.keys())
+        for term in entry.terms:
+            self._postings.setdefault((entry.scope, term), set()).add(entry.key)
+        while len(self._entries) > self.memory_size:
+            self._unindex(next(iter(self._entries.values())))
+            self._counters["memory_evictions"] += 1
+
+    def _unindex(self, entry: _Entry) -> None:
+        self._entries.pop(entry.key, None)
+        self._scope_sizes[entry.scope] -= 1
+        doc_freq = self._doc_freq[entry.scope]
+        doc_freq.subtract(entry.terms.keys())
+        for term in entry.terms:
+            postings = self._postings[(entry.scope, term)]
+            postings.discard(entry.key)
+            # Drop what no entry uses any more, or evicted vocabulary would outgrow the bound
+            if not postings:
+                del self._postings[(entry.scope, term)]
+                del doc_freq[term]
+        if not self._scope_sizes[entry.scope]:
+            del self._scope_sizes[entry.scope], self._doc_freq[entry.scope]
+
+    def _vector(self, scope: str, terms: Counter) -> dict[str, float]:
+        """Sublinear TF times smoothed IDF over the entries of one scope, L2-normalized."""
+        doc_freq = self._doc_freq.get(scope, Counter())
+        n = self._scope_sizes[scope]
+        weights = {
+            t: (1 + math.log(c)) * (math.log((1 + n) / (1 + doc_freq[t])) + 1) for t, c in terms.items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {t: w / norm for t, w in weights.items()}
+
+    def _most_similar(self, scope: str, terms: Counter) -> tuple[_Entry | None, float]:
+        # Only entries sharing at least one term can score above zero
+        candidates = set().union(*(self._postings.get((scope, t), set()) for t in terms)) if terms else set()
+        if not candidates:
+            return None, 0.0
+        query = self._vector(scope, terms)
+        best, best_score = None, 0.0
+        for key in candidates:
+            entry = self._entries[key]
+            vector = self._vector(scope, entry.terms)
+            score = sum(w * vector.get(t, 0.0) for t, w in query.items())
+            if score > best_score and not self._expired(entry):
+                best, best_score = entry, score
+        return best, best_score
+
+
+_cache: SuggestionCache | None = None
+_cache_pid: int | None = None
+_cache_lock = threading.Lock()
+
+
+def get_suggestion_cache() -> SuggestionCache:
+    """Process-wide cache instance; re-created after a fork so SQLite handles are never shared."""
+    global _cache, _cache_pid
+    with _cache_lock:
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = SuggestionCache()
+            _cache_pid = os.getpid()
+        return _cache
@@ -0,0 +1,107 @@
+"""
+Bounded-memory handling of Track A uploads.
+Request bodies are size-checked while they stream in, and spreadsheets are kept in spooled
+temporary files (in memory up to a threshold, on disk beyond it) rather than in one bytes
+object, so concurrent large uploads stay within a fixed memory budget.
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+from app.utils.workbook_readers import supported_extensions
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "20"))
+MAX_UPLOAD_BYTES = MAX_UPLOAD_MB * 1024 * 1024
+SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_KB", "1024")) * 1024
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None  # None: the system temp dir
+CHUNK_SIZE = 1024 * 1024
+# Headroom for the multipart framing around the file part
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"File too large. Max {MAX_UPLOAD_MB}MB.")
+
+
+class UploadLimitMiddleware:
+    """Reject request bodies over the upload limit as they arrive, before they are fully read."""
+
+    def __init__(self, app, path_prefix: str, max_bytes: int = MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            return await self.app(scope, receive, send)
+
+        declared = Headers(scope=scope).get("content-length", "")
+        if declared.isdigit() and int(declared) > self.max_bytes:
+            response = JSONResponse({"detail": _too_large().detail}, status_code=413)
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            # Chunked bodies carry no Content-Length, so count as the multipart parser reads
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def check_spreadsheet_upload(file: UploadFile) -> None:
+    extensions = supported_extensions()
+    if not file.filename or Path(file.filename).suffix.lower() not in extensions:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Supported: {', '.join(extensions)}.")
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+
+async def _copy_upload(file: UploadFile, dest: BinaryIO) -> None:
+    await file.seek(0)
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_UPLOAD_BYTES:
+            raise _too_large()
+        dest.write(chunk)
+    dest.seek(0)
+
+
+async def spool_upload(file: UploadFile) -> BinaryIO:
+    """
+    Copy an upload into a spooled temp file owned by the caller, for work that outlives
+    the request (the framework closes the UploadFile once the endpoint returns).
+    """
+    check_spreadsheet_upload(file)
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES, dir=UPLOAD_TMP_DIR)
+    try:
+        await _copy_upload(file, spool)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def persist_upload(file: UploadFile) -> Path:
+    """Write an upload to a named temp file another process can open; the caller deletes it."""
+    check_spreadsheet_upload(file)
+    with tempfile.NamedTemporaryFile(suffix=Path(file.filename).suffix, dir=UPLOAD_TMP_DIR, delete=False) as tmp:
+        try:
+            await _copy_upload(file, tmp)
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    return Path(tmp.name)
@@ -1,5 +1,36 @@
 """Deterministic value parsing — no LLM needed here."""
 import re
+from collections.abc import Sequence
+from itertools import repeat
+from operator import itemgetter
+
+import numpy as np
+
+NULL_TOKENS = frozenset({"N/A", "NA", "NULL", "NONE", "-", "", "#N/A", "#VALUE!"})
+TRUE_TOKENS = frozenset({"YES", "TRUE", "Y"})
+FALSE_TOKENS = frozenset({"NO", "FALSE", "N"})
+STRIP_CHARS = (",", "$", "€", "£", "₹")
+
+# Column profiles, see profile_column
+NUMERIC = "numeric"
+NUMERIC_SENTINELS = "numeric_sentinels"
+PERCENT = "percent"
+BOOLEAN = "boolean"
+MIXED = "mixed"
+
+VALIDATION_RULES = {
+    "efficiency": (0, 100),
+    "plant_load_factor": (0, 100),
+    "coal_consumption": (0, 50000),
+    "co2_emissions": (0, 1_000_000),
+}
+NEGATIVE_ALLOWED = frozenset({"heat_rate"})
+
+# Cell types whose str() round-trips through float() to the same value as float(cell)
+_NUMERIC_TYPES = frozenset({int, float, bool})
+_NONE_TYPE = type(None)
+_LAST_CHAR = itemgetter(-1)
+_ALL_BUT_LAST = itemgetter(slice(None, -1))
 
 
 def parse_value(raw: str | int | float | None) -> float | None:
@@ -17,13 +48,13 @@ def parse_value(raw: str | int | float | None) -> float | None:
 
     value = str(raw).strip()
 
-    if value.upper() in {"N/A", "NA", "NULL", "NONE", "-", "", "#N/A", "#VALUE!"}:
+    if value.upper() in NULL_TOKENS:
         return None
 
-    if value.upper() in {"YES", "TRUE", "Y"}:
+    if value.upper() in TRUE_TOKENS:
         return 1.0
 
-    if value.upper() in {"NO", "FALSE", "N"}:
+    if value.upper() in FALSE_TOKENS:
         return 0.0
 
     # Remove percentage sign — convert to decimal
@@ -42,27 +73,252 @@ def parse_value(raw: str | int | float | None) -> float | None:
         return None
 
 
+def _case_variants(token: str) -> set[str]:
+    variants = {""}
+    for ch in token:
+        variants = {v + c for v in variants for c in {ch.lower(), ch.upper()}}
+    return variants
+
+
+# Every ASCII spelling whose .upper() is a token, mapped to 1 (null), 2 (true) or 3 (false)
+_TOKEN_CODES = {
+    variant: code
+    for code, tokens in ((1, NULL_TOKENS), (2, TRUE_TOKENS), (3, FALSE_TOKENS))
+    for token in tokens
+    for variant in _case_variants(token)
+}
+
+
+def _floats(texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """float() over a list of strings; returns (values, failed mask)."""
+    try:
+        return np.fromiter(map(float, texts), dtype=np.float64, count=len(texts)), np.zeros(len(texts), dtype=bool)
+    except ValueError:
+        pass
+    out = np.full(len(texts), np.nan)
+    failed = np.zeros(len(texts), dtype=bool)
+    for i, text in enumerate(texts):
+        try:
+            out[i] = float(text)
+        except ValueError:
+            failed[i] = True
+    return out, failed
+
+
+def parse_column(values: Sequence) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batch version of parse_value for a whole column.
+    Returns (float64 values, null mask); wherever the mask is True parse_value would
+    return None and the value slot holds NaN. Every other slot equals parse_value exactly.
+    """
+    n = len(values)
+    out = np.full(n, np.nan)
+    null = np.ones(n, dtype=bool)
+    if n == 0:
+        return out, null
+
+    # Fast path: columns openpyxl already returned as numbers
+    kinds = set(map(type, values))
+    if kinds <= _NUMERIC_TYPES | {_NONE_TYPE}:
+        try:
+            if _NONE_TYPE not in kinds:
+                return np.array(values, dtype=np.float64), np.zeros(n, dtype=bool)
+            present = np.fromiter((v is not None for v in values), dtype=bool, count=n)
+            out[present] = np.array([v for v in values if v is not None], dtype=np.float64)
+            return out, ~present
+        except OverflowError:
+            pass  # ints beyond float range go through str() like the scalar path
+
+    numeric_idx: list[int] = []
+    all_text = kinds == {str}
+    if all_text:
+        text_idx, texts = list(range(n)), list(values)
+    else:
+        kinds_by_cell = list(map(type, values))
+        numeric_idx = [i for i, k in enumerate(kinds_by_cell) if k in _NUMERIC_TYPES]
+        text_idx = [i for i, k in enumerate(kinds_by_cell) if k not in _NUMERIC_TYPES and k is not _NONE_TYPE]
+        texts = [values[i] if kinds_by_cell[i] is str else str(values[i]) for i in text_idx]
+
+    if not "".join(texts).isascii():
+        # Non-ASCII whitespace and case folding follow subtler rules; keep the scalar path
+        ascii_idx, ascii_texts = [], []
+        for i, text in zip(text_idx, texts):
+            if text.isascii():
+                ascii_idx.append(i)
+                ascii_texts.append(text)
+            else:
+                parsed = parse_value(values[i])
+                if parsed is not None:
+                    out[i] = parsed
+                    null[i] = False
+        text_idx, texts = ascii_idx, ascii_texts
+        all_text = False
+
+    if numeric_idx:
+        idx = np.array(numeric_idx)
+        try:
+            out[idx] = np.array([values[i] for i in numeric_idx], dtype=np.float64)
+        except OverflowError:
+            out[idx] = [parse_value(values[i]) for i in numeric_idx]
+        null[idx] = False
+    if not texts:
+        return out, null
+
+    text_idx = np.arange(n) if all_text else np.array(text_idx)
+
+    # Optimistic pass: float() already ignores surrounding whitespace and rejects every token,
+    # percentage and currency string, so a column of plain numeric strings is finished here
+    try:
+        out[text_idx] = np.fromiter(map(float, texts), dtype=np.float64, count=len(texts))
+        null[text_idx] = False
+        return out, null
+    except ValueError:
+        pass
+
+    # Low-cardinality columns (percentages, sentinels, repeated readings): parse each distinct string once
+    distinct = dict.fromkeys(texts)
+    if len(distinct) * 2 <= len(texts):
+        position = {text: i for i, text in enumerate(distinct)}
+        distinct_out, distinct_null = parse_column(list(distinct))
+        inverse = np.fromiter(map(position.__getitem__, texts), dtype=np.intp, count=len(texts))
+        out[text_idx] = distinct_out[inverse]
+        null[text_idx] = distinct_null[inverse]
+        return out, null
+
+    stripped = list(map(str.strip, texts))
+    codes = np.fromiter(map(_TOKEN_CODES.get, stripped, repeat(0)), dtype=np.int8, count=len(stripped))
+    out[text_idx[codes == 2]] = 1.0
+    out[text_idx[codes == 3]] = 0.0
+    null[text_idx[codes >= 2]] = False
+
+    joined = "\x00".join(stripped)
+    is_pct = np.zeros(len(stripped), dtype=bool)
+    if "%" in joined:
+        is_pct = np.fromiter(map(str.endswith, stripped, repeat("%")), dtype=bool, count=len(stripped))
+    is_pct &= codes == 0
+    is_plain = (codes == 0) & ~is_pct
+
+    if is_pct.any():
+        pct_idx = np.flatnonzero(is_pct)
+        pct = stripped if len(pct_idx) == len(stripped) else [stripped[i] for i in pct_idx.tolist()]
+        # value[:-1] keeps any further trailing '%', which float() then rejects
+        body = list(map(str.rstrip, pct, repeat("%")))
+        if "," in joined:
+            body = list(map(str.replace, body, repeat(","), repeat("")))
+        parsed, failed = _floats(body)
+        failed |= np.fromiter(map(str.endswith, pct, repeat("%%")), dtype=bool, count=len(pct))
+        ok = text_idx[pct_idx[~failed]]
+        out[ok] = parsed[~failed] / 100
+        null[ok] = False
+
+    if is_plain.any():
+        plain_idx = np.flatnonzero(is_plain)
+        cleaned = stripped if len(plain_idx) == len(stripped) else [stripped[i] for i in plain_idx.tolist()]
+        # Thousands separators and currency symbols, only scanned for when the column contains them
+        for ch in STRIP_CHARS:
+            if ch in joined:
+                cleaned = list(map(str.replace, cleaned, repeat(ch), repeat("")))
+        parsed, failed = _floats(cleaned)
+        ok = text_idx[plain_idx[~failed]]
+        out[ok] = parsed[~failed]
+        null[ok] = False
+
+    return out, null
+
+
+def profile_column(sample: Sequence) -> str:
+    """
+    Classify a sample of a column's cells: NUMERIC (numbers only), NUMERIC_SENTINELS
+    (numbers and null tokens like "N/A"), PERCENT ("45%" strings), BOOLEAN (YES/NO
+    tokens) or MIXED. Empty cells are ignored. The class only picks a parse path in
+    parse_profiled; it is never trusted for correctness.
+    """
+    kinds = set(map(type, sample)) - {_NONE_TYPE}
+    if kinds <= _NUMERIC_TYPES:
+        return NUMERIC
+    if kinds - _NUMERIC_TYPES - {str}:
+        return MIXED
+    stripped = [v.strip() for v in sample if type(v) is str]
+    codes = [_TOKEN_CODES.get(t, 0) for t in stripped]
+    if all(c == 1 for c in codes):
+        return NUMERIC_SENTINELS
+    if kinds & _NUMERIC_TYPES:
+        return MIXED
+    if all(c > 0 for c in codes):
+        return BOOLEAN
+    if all(c == 1 or t.endswith("%") for t, c in zip(stripped, codes)):
+        return PERCENT
+    return MIXED
+
+
+def parse_profiled(values: Sequence, profile: str) -> tuple[np.ndarray, np.ndarray]:
+    """
+    parse_column through the fast path for the column's profile. Each path checks its
+    assumptions on the cells it is given and hands anything that does not fit to
+    parse_column, so the result is always identical to parse_column's.
+    """
+    n = len(values)
+    if profile == NUMERIC_SENTINELS:
+        # Sentinels parse to None exactly like empty cells, which the numeric fast path handles
+        texts = [v for v in values if type(v) is str]
+        if all(_TOKEN_CODES.get(t.strip()) == 1 for t in texts):
+            return parse_column([None if type(v) is str else v for v in values] if texts else values)
+    elif profile in (PERCENT, BOOLEAN) and n and set(map(type, values)) <= {str, _NONE_TYPE}:
+        stripped = list(map(str.strip, values)) if None not in values else ["" if v is None else v.strip() for v in values]
+        out = np.full(n, np.nan)
+        if profile == BOOLEAN:
+            codes = np.fromiter(map(_TOKEN_CODES.get, stripped, repeat(0)), dtype=np.int8, count=n)
+            if codes.all():
+                out[codes == 2] = 1.0
+                out[codes == 3] = 0.0
+                return out, codes == 1
+        else:
+            if all(stripped) and "".join(map(_LAST_CHAR, stripped)).count("%") == n:
+                is_pct, others = np.ones(n, dtype=bool), []
+            else:
+                is_pct = np.fromiter(map(str.endswith, stripped, repeat("%")), dtype=bool, count=n)
+                others = np.flatnonzero(~is_pct).tolist()
+            if all(_TOKEN_CODES.get(stripped[i]) == 1 for i in others):
+                pct_idx = np.flatnonzero(is_pct)
+                pct = [stripped[i] for i in pct_idx.tolist()] if others else stripped
+                # value[:-1] like parse_value: a second trailing '%' makes float() fail
+                body = list(map(_ALL_BUT_LAST, pct))
+                if "," in "".join(body):
+                    body = list(map(str.replace, body, repeat(","), repeat("")))
+                parsed, failed = _floats(body)
+                null = np.ones(n, dtype=bool)
+                out[pct_idx] = parsed / 100
+                null[pct_idx] = failed
+                return out, null
+    return parse_column(values)
+
+
+def flag_values(param_name: str, values: np.ndarray, null: np.ndarray) -> np.ndarray:
+    """Ascending indexes of the values validate_value would warn about, found without a per-value loop."""
+    flagged = np.zeros(len(values), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        if param_name in VALIDATION_RULES:
+            lo, hi = VALIDATION_RULES[param_name]
+            flagged |= ~((values >= lo) & (values <= hi))  # also NaN, which fails the range check
+        if param_name not in NEGATIVE_ALLOWED:
+            flagged |= values < 0
+    return np.flatnonzero(flagged & ~null)
+
+
 def validate_value(param_name: str, value: float | None) -> list[str]:
     """Return list of warning strings for suspicious values."""
     warnings = []
     if value is None:
         return warnings
 
-    rules = {
-        "efficiency": (0, 100),
-        "plant_load_factor": (0, 100),
-        "coal_consumption": (0, 50000),
-        "co2_emissions": (0, 1_000_000),
-    }
-
-    if param_name in rules:
-        lo, hi = rules[param_name]
+    if param_name in VALIDATION_RULES:
+        lo, hi = VALIDATION_RULES[param_name]
         if not (lo <= value <= hi):
             warnings.append(
                 f"Value {value} for '{param_name}' is outside expected range [{lo}, {hi}]"
             )
 
-    if value < 0 and param_name not in {"heat_rate"}:
+    if value < 0 and param_name not in NEGATIVE_ALLOWED:
         warnings.append(f"Negative value {value} for '{param_name}' may be invalid")
 
     return warnings
\ No newline at end of file
@@ -0,0 +1,558 @@
+"""
+Pluggable readers that turn an uploaded spreadsheet into sheets of plain value rows.
+Every format goes through the same header detection, mapping and value parsing; a reader
+only has to list its sheets and stream each one's rows. CSV/TSV files are streamed line
+by line and never loaded whole; .xls needs the optional `xlrd` package; .ods streams the
+document's content.xml with an incremental XML parser. .xlsx sheets are read straight
+from the zip by a values-only XML reader, falling back to openpyxl for workbooks it does
+not handle.
+"""
+import csv
+import io
+import logging
+import os
+import zipfile
+from collections.abc import Callable, Iterator, Sequence
+from datetime import datetime
+from itertools import repeat
+from pathlib import Path
+from typing import BinaryIO
+from xml.etree.ElementTree import XMLPullParser, fromstring, iterparse
+
+import openpyxl
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, WINDOWS_EPOCH, from_excel, from_ISO8601
+from openpyxl.xml.constants import (
+    ARC_CONTENT_TYPES,
+    ARC_STYLE,
+    CONTYPES_NS,
+    REL_NS,
+    SHARED_STRINGS,
+    SHEET_MAIN_NS,
+    XLSM,
+    XLSX,
+    XLTM,
+    XLTX,
+)
+
+try:
+    import xlrd
+except ImportError:
+    xlrd = None
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 64 * 1024
+XML_CHUNK_SIZE = 64 * 1024
+FAST_XLSX_ENABLED = os.getenv("FAST_XLSX_READER", "1") == "1"
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+class WorkbookReader:
+    """
+    Base reader. sheetnames lists the sheets in workbook order and rows(name) streams a
+    sheet's rows as sequences of cell values (None for an empty cell). typed is False for
+    formats whose cells are all text, so numeric-looking strings are values, not headers.
+    sheets_named_after_file is True when sheet names come from the filename, not the bytes.
+    """
+
+    typed = True
+    sheets_named_after_file = False
+    sheetnames: list[str]
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        raise NotImplementedError
+
+    def content_hash(self, sheet: str) -> str | None:
+        """A cheap fingerprint that changes whenever the sheet's values may have, if the format has one."""
+        return None
+
+    def row_count(self, sheet: str) -> int | None:
+        """The sheet's row count as recorded in the file, or an estimate; None when unknown without reading it."""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class XlsxReader(WorkbookReader):
+    """openpyxl in read-only, values-only mode."""
+
+    def __init__(self, source: BinaryIO, filename: str):
+        self._wb = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        self.sheetnames = list(self._wb.sheetnames)
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        return self._wb[sheet].iter_rows(values_only=True)
+
+    def content_hash(self, sheet: str) -> str | None:
+        """
+        CRC32s, from the zip directory, of the sheet's XML and of the shared-string and style
+        parts its values depend on. Costs no decompression.
+        """
+        archive = getattr(self._wb, "_archive", None)
+        path = getattr(self._wb[sheet], "_worksheet_path", None)
+        if archive is None or path is None:
+            return None
+        return _zip_fingerprint(archive, (path.lstrip("/"), "xl/sharedStrings.xml", "xl/styles.xml"))
+
+    def row_count(self, sheet: str) -> int | None:
+        return self._wb[sheet].max_row
+
+    def close(self) -> None:
+        self._wb.close()
+
+
+_MAIN = "{%s}" % SHEET_MAIN_NS
+_ROW, _CELL, _VALUE, _INLINE = _MAIN + "row", _MAIN + "c", _MAIN + "v", _MAIN + "is"
+_T, _RUN, _SI = _MAIN + "t", _MAIN + "r", _MAIN + "si"
+_SHEET_DATA, _DIMENSION = _MAIN + "sheetData", _MAIN + "dimension"
+_DIGITS = "0123456789"
+
+
+class FastXlsxReader(WorkbookReader):
+    """
+    Values-only xlsx reader that streams each sheet's XML straight from the zip, skipping
+    the cell objects and style metadata openpyxl builds. Rows match openpyxl's read-only
+    iter_rows(values_only=True): same value types, date styles, 1904 epoch and padding to
+    the sheet's recorded dimension. Raises UnsupportedFormat for workbooks it leaves to
+    openpyxl (chartsheets, unusual packaging).
+    """
+
+    def __init__(self, source: BinaryIO, filename: str):
+        self._zip = zipfile.ZipFile(source)
+        try:
+            self._read_workbook()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def _read_workbook(self) -> None:
+        names = set(self._zip.namelist())
+        types = fromstring(self._zip.read(ARC_CONTENT_TYPES))
+        parts = {o.get("ContentType"): o.get("PartName", "").lstrip("/") for o in types.iter(f"{{{CONTYPES_NS}}}Override")}
+        workbook = next((parts[t] for t in (XLTM, XLTX, XLSM, XLSX) if t in parts), None)
+        if workbook is None:
+            raise UnsupportedFormat("No workbook part in the content types.")
+        self._strings_path = parts.get(SHARED_STRINGS)
+        self._strings: list[str] | None = None
+
+        root = fromstring(self._zip.read(workbook))
+        props = root.find(_MAIN + "workbookPr")
+        date1904 = props is not None and props.get("date1904", "").lower() in ("1", "true")
+        self._epoch = CALENDAR_MAC_1904 if date1904 else WINDOWS_EPOCH
+
+        rels = get_dependents(self._zip, get_rels_path(workbook)).to_dict()
+        self._paths: dict[str, str] = {}
+        for sheet in root.iterfind(f"{_MAIN}sheets/{_MAIN}sheet"):
+            rel = rels.get(sheet.get(f"{{{REL_NS}}}id"))
+            if rel is None or rel.target not in names:
+                continue  # openpyxl drops these too
+            if not rel.Type.endswith("/worksheet"):
+                raise UnsupportedFormat(f"Sheet {sheet.get('name')!r} is not a worksheet.")
+            self._paths[sheet.get("name")] = rel.target
+        self.sheetnames = list(self._paths)
+        self._date_styles, self._timedelta_styles = self._read_number_formats()
+
+    def _read_number_formats(self) -> tuple[frozenset[int], frozenset[int]]:
+        """Indexes of the cell styles whose number format shows a date, and a duration."""
+        try:
+            root = fromstring(self._zip.read(ARC_STYLE))
+        except KeyError:
+            return frozenset(), frozenset()
+        custom = {int(f.get("numFmtId")): f.get("formatCode") for f in root.iterfind(f"{_MAIN}numFmts/{_MAIN}numFmt")}
+        dates, durations = set(), set()
+        for idx, xf in enumerate(root.iterfind(f"{_MAIN}cellXfs/{_MAIN}xf")):
+            code = int(xf.get("numFmtId", 0))
+            fmt = custom[code] if code in custom else builtin_format_code(code)
+            if is_date_format(fmt):
+                dates.add(idx)
+            if is_timedelta_format(fmt):
+                durations.add(idx)
+        return frozenset(dates), frozenset(durations)
+
+    def _shared_strings(self) -> list[str]:
+        if self._strings is None:
+            strings = []
+            if self._strings_path is not None:
+                with self._zip.open(self._strings_path) as f:
+                    for _, elem in iterparse(f):
+                        if elem.tag == _SI:
+                            strings.append(_rich_text(elem).replace("x005F_", ""))
+                            elem.clear()
+            self._strings = strings
+        return self._strings
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        strings = self._shared_strings()
+        dates, durations, epoch = self._date_styles, self._timedelta_styles, self._epoch
+        columns: dict[str, int] = {}
+        max_col = max_row = None
+        empty_row: tuple = ()
+        expected = 1  # next row number to yield
+        row_number = 0
+        with self._zip.open(self._paths[sheet]) as f:
+            for elem in _sheet_elements(f):
+                if elem.tag == _DIMENSION:
+                    _, _, max_col, max_row = range_boundaries(elem.get("ref"))
+                    empty_row = (None,) * max_col if max_col else ()
+                    continue
+
+                r = elem.get("r")
+                row_number = int(r) if r is not None and r.isdigit() else _row_number(r, row_number)
+                if max_row is not None and row_number > max_row:
+                    break
+                if row_number < expected:  # repeated or out-of-order row; openpyxl skips it too
+                    continue
+                if row_number > expected:
+                    yield from repeat(empty_row, row_number - expected)
+                expected = row_number + 1
+
+                # Without a dimension a row is as wide as the column of its last cell
+                row = [None] * max_col if max_col else []
+                width = len(row)
+                col = 0
+                for c in elem:
+                    ref = c.get("r")
+                    if ref is None:
+                        col += 1
+                    else:
+                        letters = ref.rstrip(_DIGITS)
+                        col = columns.get(letters) or columns.setdefault(letters, column_index_from_string(letters))
+                    if col > width:
+                        if max_col:
+                            continue
+                        row.extend(repeat(None, col - width))
+                        width = col
+                    kind = c.get("t", "n")
+                    if kind == "inlineStr":
+                        inline = c.find(_INLINE)
+                        value = _rich_text(inline) if inline is not None else None
+                    else:
+                        value = c.findtext(_VALUE) or None
+                        if value is not None:
+                            if kind == "n":
+                                value = float(value) if "." in value or "e" in value or "E" in value else int(value)
+                                style = int(c.get("s") or 0)
+                                if style in dates:
+                                    try:
+                                        value = from_excel(value, epoch, timedelta=style in durations)
+                                    except (OverflowError, ValueError):
+                                        value = "#VALUE!"
+                            elif kind == "s":
+                                value = strings[int(value)]
+                            elif kind == "b":
+                                value = bool(int(value))
+                            elif kind == "d":
+                                value = from_ISO8601(value)
+                    row[col - 1] = value
+                if not max_col:
+                    del row[col:]
+                yield tuple(row)
+
+        if max_row is not None and row_number > max_row:
+            yield from repeat(empty_row, max_row + 1 - expected)
+
+    def content_hash(self, sheet: str) -> str | None:
+        """Same parts as XlsxReader, so switching readers does not invalidate ingestion state."""
+        return _zip_fingerprint(self._zip, (self._paths[sheet], "xl/sharedStrings.xml", "xl/styles.xml"))
+
+    def row_count(self, sheet: str) -> int | None:
+        """From the sheet's <dimension>, which precedes its rows."""
+        with self._zip.open(self._paths[sheet]) as f:
+            for elem in _sheet_elements(f):
+                return range_boundaries(elem.get("ref"))[3] if elem.tag == _DIMENSION else None
+        return None
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def _rich_text(elem) -> str:
+    """Text of a shared or inline string: its plain <t> plus the runs, without phonetic hints."""
+    parts = []
+    for child in elem:
+        if child.tag == _T:
+            parts.append(child.text or "")
+        elif child.tag == _RUN:
+            parts.append(child.findtext(_T) or "")
+    return "".join(parts)
+
+
+def _sheet_elements(f: BinaryIO) -> Iterator:
+    """
+    The sheet's <dimension>, then each <row> once all its cells are parsed. Only start
+    events are read, which halves the per-element overhead of iterparse: a row is complete
+    when the next one starts, and rows already handed out are dropped from <sheetData>.
+    """
+    parser = XMLPullParser(events=("start",))
+    sheet_data = row = None
+    while chunk := f.read(XML_CHUNK_SIZE):
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            tag = elem.tag
+            if tag == _CELL or tag == _VALUE:
+                continue
+            if tag == _ROW:
+                if row is not None:
+                    yield row
+                    sheet_data.clear()  # the builder still holds the new row and fills it in
+                row = elem
+            elif tag == _SHEET_DATA:
+                sheet_data = elem
+            elif tag == _DIMENSION:
+                yield elem
+    parser.close()
+    if row is not None:
+        yield row
+
+
+def _row_number(r: str | None, previous: int) -> int:
+    if r is None:
+        return previous + 1
+    number = float(r)
+    if not number.is_integer():
+        raise ValueError(f"{r} is not a valid row number")
+    return int(number)
+
+
+def open_xlsx(source: BinaryIO, filename: str) -> WorkbookReader:
+    """The fast reader where it applies, otherwise openpyxl."""
+    if FAST_XLSX_ENABLED:
+        start = source.tell()
+        try:
+            return FastXlsxReader(source, filename)
+        except Exception as e:
+            logger.info(f"Fast xlsx reader declined {filename!r} ({e}); using openpyxl")
+            source.seek(start)
+    return XlsxReader(source, filename)
+
+
+class CsvReader(WorkbookReader):
+    """One sheet, named after the file. The delimiter is sniffed unless the extension is .tsv."""
+
+    typed = False
+    sheets_named_after_file = True
+
+    def __init__(self, source: BinaryIO, filename: str):
+        self._source = source
+        self._start = source.tell()
+        sample = source.read(SNIFF_BYTES)
+        source.seek(self._start)
+        try:
+            text = sample.decode("utf-8-sig")
+            self._encoding = "utf-8-sig"
+        except UnicodeDecodeError as e:
+            if e.start < len(sample) - 3:  # not just a multi-byte character cut off by the sample
+                text, self._encoding = sample.decode("cp1252", errors="replace"), "cp1252"
+            else:
+                text, self._encoding = sample[: e.start].decode("utf-8-sig"), "utf-8-sig"
+
+        if filename.lower().endswith(".tsv"):
+            self._delimiter = "\t"
+        else:
+            try:
+                self._delimiter = csv.Sniffer().sniff(text, delimiters=",;\t|").delimiter
+            except csv.Error:
+                self._delimiter = ","
+        self.sheetnames = [Path(filename).stem or "Sheet1"]
+        self._sample_lines = sample.count(b"\n")
+        self._sample_bytes = len(sample)
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        # Re-reads from the start each call; only one iterator at a time may be consumed
+        self._source.seek(self._start)
+        text = io.TextIOWrapper(self._source, encoding=self._encoding, errors="replace", newline="")
+        try:
+            yield from csv.reader(text, delimiter=self._delimiter)
+        finally:
+            if not self._source.closed:
+                text.detach()  # the caller owns the source and closes it
+
+    def row_count(self, sheet: str) -> int | None:
+        """Estimated from the line length of the sniffed sample."""
+        if not self._sample_bytes:
+            return 0
+        position = self._source.tell()
+        size = self._source.seek(0, io.SEEK_END) - self._start
+        self._source.seek(position)
+        return max(1, round(size * self._sample_lines / self._sample_bytes))
+
+
+class XlsReader(WorkbookReader):
+    """Legacy BIFF workbooks through xlrd, which reads the whole file into memory."""
+
+    def __init__(self, source: BinaryIO, filename: str):
+        if xlrd is None:
+            raise UnsupportedFormat("Reading .xls files needs the optional `xlrd` package.")
+        self._book = xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+        self.sheetnames = self._book.sheet_names()
+
+    def row_count(self, sheet: str) -> int | None:
+        return self._book.sheet_by_name(sheet).nrows
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        ws = self._book.sheet_by_name(sheet)
+        for r in range(ws.nrows):
+            yield tuple(map(self._value, ws.row(r)))
+
+    def _value(self, cell) -> object:
+        ctype, value = cell.ctype, cell.value
+        if ctype == xlrd.XL_CELL_NUMBER:
+            return int(value) if value.is_integer() else value  # openpyxl reports whole numbers as int too
+        if ctype == xlrd.XL_CELL_TEXT:
+            return value
+        if ctype == xlrd.XL_CELL_DATE:
+            try:
+                return xlrd.xldate_as_datetime(value, self._book.datemode)
+            except (ValueError, OverflowError, xlrd.xldate.XLDateError):
+                return value
+        if ctype == xlrd.XL_CELL_BOOLEAN:
+            return bool(value)
+        if ctype == xlrd.XL_CELL_ERROR:
+            return xlrd.error_text_from_code.get(value, "#ERR")
+        return None
+
+    def close(self) -> None:
+        self._book.release_resources()
+
+
+_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+class OdsReader(WorkbookReader):
+    """
+    OpenDocument spreadsheets. content.xml holds every sheet in sequence, so listing the
+    sheets and streaming each one are separate incremental passes over it.
+    """
+
+    def __init__(self, source: BinaryIO, filename: str):
+        self._zip = zipfile.ZipFile(source)
+        self.sheetnames = []
+        with self._zip.open("content.xml") as f:
+            for event, elem in iterparse(f, events=("start", "end")):
+                if event == "start" and elem.tag == _TABLE + "table":
+                    self.sheetnames.append(elem.get(_TABLE + "name"))
+                elif event == "end" and elem.tag == _TABLE + "table-row":
+                    elem.clear()
+
+    def rows(self, sheet: str) -> Iterator[Sequence]:
+        with self._zip.open("content.xml") as f:
+            table = None
+            blank_rows = 0  # held back until a later row shows they are not the sheet's padding
+            for event, elem in iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == _TABLE + "table" and table is None and elem.get(_TABLE + "name") == sheet:
+                        table = elem
+                    continue
+                if elem.tag == _TABLE + "table" and elem is table:
+                    return
+                if elem.tag != _TABLE + "table-row":
+                    continue
+                if table is None:
+                    elem.clear()
+                    continue
+                row = self._row(elem)
+                count = int(elem.get(_TABLE + "number-rows-repeated", "1"))
+                elem.clear()
+                table.clear()  # rows already read are not kept around
+                if not row:
+                    blank_rows += count
+                    continue
+                yield from repeat((), blank_rows)
+                blank_rows = 0
+                yield from repeat(row, count)
+
+    @staticmethod
+    def _row(elem) -> tuple:
+        values: list = []
+        blank_cells = 0
+        for cell in elem:
+            if cell.tag not in (_TABLE + "table-cell", _TABLE + "covered-table-cell"):
+                continue
+            value = OdsReader._value(cell)
+            count = int(cell.get(_TABLE + "number-columns-repeated", "1"))
+            if value is None:
+                blank_cells += count  # trailing blanks are often repeated to the sheet's last column
+                continue
+            values.extend(repeat(None, blank_cells))
+            blank_cells = 0
+            values.extend(repeat(value, count))
+        return tuple(values)
+
+    @staticmethod
+    def _value(cell) -> object:
+        kind = cell.get(_OFFICE + "value-type")
+        if kind in ("float", "percentage", "currency"):
+            number = float(cell.get(_OFFICE + "value"))
+            return int(number) if number.is_integer() else number
+        if kind == "date":
+            try:
+                return datetime.fromisoformat(cell.get(_OFFICE + "date-value"))
+            except (TypeError, ValueError):
+                pass
+        elif kind == "boolean":
+            return cell.get(_OFFICE + "boolean-value") == "true"
+        text = "\n".join("".join(p.itertext()) for p in cell.iter(_TEXT + "p"))
+        return text or None
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def _zip_fingerprint(archive: zipfile.ZipFile, names: Sequence[str]) -> str:
+    parts = []
+    for name in names:
+        try:
+            info = archive.getinfo(name)
+        except KeyError:
+            parts.append(f"{name}:-")
+            continue
+        parts.append(f"{name}:{info.CRC:08x}:{info.file_size}")
+    return "|".join(parts)
+
+
+ReaderFactory = Callable[[BinaryIO, str], WorkbookReader]
+
+READERS: dict[str, ReaderFactory] = {
+    ".xlsx": open_xlsx,
+    ".xlsm": open_xlsx,
+    ".csv": CsvReader,
+    ".tsv": CsvReader,
+    ".xls": XlsReader,
+    ".ods": OdsReader,
+}
+
+
+def register_reader(extension: str, factory: ReaderFactory) -> None:
+    """Add or replace the reader for a file extension (e.g. ".xlsx")."""
+    READERS[extension.lower()] = factory
+
+
+def supported_extensions() -> list[str]:
+    """Extensions whose reader can run here (.xls only when xlrd is installed)."""
+    return [ext for ext, factory in READERS.items() if factory is not XlsReader or xlrd is not None]
+
+
+def reader_identity(filename: str) -> str:
+    """
+    What decides how a file's bytes are read: its extension (the reader), plus the stem
+    for readers that name the sheet after the file.
+    """
+    path = Path(filename or "")
+    extension = path.suffix.lower()
+    factory = READERS.get(extension, open_xlsx)
+    return f"{extension}:{path.stem}" if getattr(factory, "sheets_named_after_file", False) else extension
+
+
+def open_workbook(source: bytes | BinaryIO, filename: str) -> WorkbookReader:
+    """Reader for the file's extension; files without a known extension are read as xlsx."""
+    factory = READERS.get(Path(filename or "").suffix.lower(), open_xlsx)
+    return factory(io.BytesIO(source) if isinstance(source, bytes) else source, filename or "")
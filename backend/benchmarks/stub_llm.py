@@ -0,0 +1,37 @@
+"""
+Deterministic stand-in for the Gemini client, so benchmarks measure our code and not the
+provider. It answers mapping prompts from the generator's header catalogue, with an
+optional fixed latency, and reports no usage metadata (token counts are estimated).
+"""
+import json
+import re
+import time
+from types import SimpleNamespace
+
+from app.utils.mapping_cache import normalize_header
+from benchmarks.workbooks import header_catalogue
+
+_HEADER_LINE = re.compile(r'^(\d+): (".*")$', re.MULTILINE)
+
+
+class StubLLM:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._catalogue = header_catalogue()
+
+    def generate(self, prompt: str, *, temperature: float, **_) -> SimpleNamespace:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        mappings = []
+        for index, header in _HEADER_LINE.findall(prompt):
+            param, asset = self._catalogue.get(normalize_header(json.loads(header)), (None, None))
+            mappings.append({
+                "col_index": int(index),
+                "param_name": param,
+                "asset_name": asset,
+                "confidence": "high" if param else "low",
+                "reasoning": "benchmark stub",
+            })
+        return SimpleNamespace(text=json.dumps({"mappings": mappings}), usage_metadata=None)
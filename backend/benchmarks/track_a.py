@@ -0,0 +1,249 @@
+"""
+Benchmark: Track A parse_excel end to end on synthetic workbooks, with a stub LLM.
+Each scenario runs in a fresh process and reports throughput (input cells/s, best of
+--repeat runs with the parse and mapping caches cleared), peak RSS, the tracemalloc peak
+and the time spent per stage. Results can be saved as a JSON baseline and later runs
+compared against it; a throughput drop or memory growth past --tolerance fails the run.
+Baselines are only comparable on the machine that wrote them.
+
+    cd backend && python -m benchmarks.track_a [--scenario long ...] [--save FILE | --compare FILE]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from benchmarks.workbooks import WorkbookSpec, synthetic_workbook
+
+SCENARIOS = {
+    "clean": WorkbookSpec(rows=5000, columns=10),
+    "messy": WorkbookSpec(rows=5000, columns=12, title_rows=3, messy_ratio=0.2, asset_suffixes=True),
+    "wide": WorkbookSpec(rows=1000, columns=80, asset_suffixes=True),
+    "yearly": WorkbookSpec(rows=744, columns=10, sheets=12, messy_ratio=0.02),
+    "long": WorkbookSpec(rows=50000, columns=8, messy_ratio=0.02),
+}
+STAGES = ("open", "read", "map", "parse", "assemble", "serialize")
+# Lower is better for these; higher for cells_per_s
+MEMORY_METRICS = ("rss_growth_mb", "traced_peak_mb")
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _short(filename: str) -> str:
+    return "/".join(Path(filename).parts[-2:])
+
+
+def _timed(iterable, stages: dict, stage: str):
+    """iterable's items, adding the time spent producing them to stages[stage]."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            stages[stage] += time.perf_counter() - start
+            return
+        stages[stage] += time.perf_counter() - start
+        yield item
+
+
+def _instrument(ep, stages: dict) -> None:
+    """Time workbook opening, row reads and mapping calls inside excel_parser."""
+    open_workbook, call_mapping = ep.open_workbook, ep._call_gemini_for_mapping
+
+    def timed_open(source, filename):
+        start = time.perf_counter()
+        wb = open_workbook(source, filename)
+        stages["open"] += time.perf_counter() - start
+        rows = wb.rows
+        wb.rows = lambda sheet: _timed(rows(sheet), stages, "read")
+        return wb
+
+    def timed_mapping(headers, sheet_name):
+        start = time.perf_counter()
+        try:
+            return call_mapping(headers, sheet_name)
+        finally:
+            stages["map"] += time.perf_counter() - start
+
+    ep.open_workbook, ep._call_gemini_for_mapping = timed_open, timed_mapping
+
+
+def _run_scenario(path: Path, spec: dict, columnar: bool, repeat: int, latency: float) -> dict:
+    """Child-process entry point: every measurement for one workbook."""
+    from app.agents import excel_parser as ep
+    from app.utils.mapping_cache import get_mapping_cache
+    from app.utils.parse_cache import get_parse_cache
+    from app.utils.response_encoding import COLUMNAR_JSON, encode_columnar
+    from benchmarks.stub_llm import StubLLM
+
+    llm = StubLLM(latency)
+    ep.get_llm_client = lambda: llm
+    data = path.read_bytes()
+    filename = path.name
+
+    def serialize(result) -> bytes:
+        return encode_columnar(result, COLUMNAR_JSON) if columnar else result.model_dump_json().encode()
+
+    def parse():
+        get_parse_cache().clear()
+        get_mapping_cache().clear()
+        return ep.parse_excel(data, filename, columnar=columnar)
+
+    baseline_rss = _max_rss_mb()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = parse()
+        best = min(best, time.perf_counter() - start)
+        parsed = sum(len(c.rows) for c in result.columns) if columnar else len(result.parsed_data)
+        del result  # before the next run, so peak RSS covers one parse
+    calls = llm.calls // repeat
+    peak_rss = _max_rss_mb()
+
+    tracemalloc.start()
+    result = parse()
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    top = tracemalloc.take_snapshot().statistics("lineno")[:5]
+    tracemalloc.stop()
+    del result
+
+    # Instrumented last: the wrappers add a little time per row
+    stages: dict[str, float] = defaultdict(float)
+    _instrument(ep, stages)
+    get_mapping_cache().clear()
+    start = time.perf_counter()
+    records = _timed(ep.iter_parse_excel(data, filename, columnar=columnar), stages, "stream")
+    result = ep.collect_records(records, columnar)
+    stages["assemble"] = time.perf_counter() - start - stages["stream"]
+    start = time.perf_counter()
+    serialize(result)
+    stages["serialize"] = time.perf_counter() - start
+    # What the stream spent outside reading and opening is parsing (and waiting for the mapping)
+    stages["parse"] = stages.pop("stream") - stages["open"] - stages["read"]
+
+    cells = spec["rows"] * spec["columns"] * spec["sheets"]
+    return {
+        "spec": spec,
+        "cells": cells,
+        "parsed_cells": parsed,
+        "llm_calls": calls,
+        "seconds": round(best, 4),
+        "cells_per_s": round(cells / best),
+        "rss_baseline_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(peak_rss, 1),
+        "rss_growth_mb": round(peak_rss - baseline_rss, 1),
+        "traced_peak_mb": round(traced_peak / 2**20, 2),
+        "top_allocations": [f"{_short(s.traceback[0].filename)}:{s.traceback[0].lineno} {s.size / 2**20:.2f} MB" for s in top],
+        "stages": {stage: round(stages[stage], 4) for stage in STAGES},
+    }
+
+
+def run(names: list[str], columnar: bool, repeat: int, latency: float) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="latspace-bench-") as tmp:
+        for name in names:
+            spec = SCENARIOS[name]
+            path = Path(tmp) / f"{name}.xlsx"
+            path.write_bytes(synthetic_workbook(spec))
+            # A fresh process per scenario, so peak RSS belongs to that scenario alone
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+                result = pool.submit(_run_scenario, path, spec.to_dict(), columnar, repeat, latency).result()
+            results[name] = result
+            _print_result(name, result)
+    return results
+
+
+def _print_result(name: str, r: dict) -> None:
+    stages = " ".join(f"{stage}={r['stages'][stage]:.3f}" for stage in STAGES)
+    print(
+        f"{name:<8} {r['cells']:>10,} {r['seconds']:>8.3f} {r['cells_per_s']:>11,} "
+        f"{r['peak_rss_mb']:>8.1f} {r['rss_growth_mb']:>8.1f} {r['traced_peak_mb']:>8.1f}  {stages}"
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of results against baseline, one message each."""
+    regressions = []
+    for name, r in results.items():
+        old = baseline["scenarios"].get(name)
+        if old is None or old["spec"] != r["spec"]:
+            print(f"{name:<8} no comparable baseline")
+            continue
+        speed = r["cells_per_s"] / old["cells_per_s"] - 1
+        line = [f"{name:<8} cells/s {speed:+.1%}"]
+        if speed < -tolerance:
+            regressions.append(f"{name}: throughput {old['cells_per_s']:,} → {r['cells_per_s']:,} cells/s")
+        for metric in MEMORY_METRICS:
+            # Ignore growth under 1 MB: small scenarios barely move RSS
+            growth = r[metric] - old[metric]
+            line.append(f"{metric} {growth:+.1f}")
+            if growth > 1 and growth > tolerance * old[metric]:
+                regressions.append(f"{name}: {metric} {old[metric]} → {r[metric]}")
+        print("  ".join(line))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="default: all")
+    parser.add_argument("--columnar", action="store_true", help="benchmark the columnar layout")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub LLM takes per call")
+    parser.add_argument("--workers", type=int, default=1, help="PARALLEL_PARSE_WORKERS for the parse")
+    parser.add_argument("--save", type=Path, help="write the results as a baseline")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    args = parser.parse_args()
+
+    # Scenario processes inherit these: the stub stands in for the key, the mapping cache
+    # stays off disk (each run clears it), and one worker keeps stage timings in-process
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ["MAPPING_CACHE_DISK_SIZE"] = "0"
+    os.environ["PARALLEL_PARSE_WORKERS"] = str(args.workers)
+    print(f"{'scenario':<8} {'cells':>10} {'seconds':>8} {'cells/s':>11} {'peak MB':>8} {'grew MB':>8} {'traced':>8}  stages (s)")
+    results = run(args.scenario or list(SCENARIOS), args.columnar, args.repeat, args.llm_latency)
+    layout = "columnar" if args.columnar else "rows"
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "layout": layout,
+            "workers": args.workers,
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        }
+        args.save.write_text(json.dumps({"meta": meta, "scenarios": results}, indent=2) + "\n")
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        if not args.compare.exists():
+            print(f"No baseline at {args.compare}; run with --save first")
+            return
+        baseline = json.loads(args.compare.read_text())
+        if baseline["meta"]["layout"] != layout or baseline["meta"]["workers"] != args.workers:
+            raise SystemExit(f"Baseline was taken with {baseline['meta']['layout']} / {baseline['meta']['workers']} workers")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            raise SystemExit("Regressions:\n  " + "\n  ".join(regressions))
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Synthetic plant-log workbooks for the benchmarks.
+Headers come from the parameter registry in four spellings (display name, display name
+with unit, abbreviated capitals, and a DCS tag only the LLM can resolve), optionally
+suffixed with an asset; every header the generator can write is listed by
+header_catalogue(), which the stub LLM maps from.
+"""
+import io
+import random
+import re
+import zipfile
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+import openpyxl
+
+from app.utils.mapping_cache import normalize_header
+from app.utils.registry import get_registry
+
+_INLINE_CELL = re.compile(rb'<c r="([A-Z]+\d+)"((?: s="\d+")?) t="inlineStr"><is><t>(.*?)</t></is></c>')
+_INNER_VOWELS = re.compile(r"(?<=\w)[aeiou](?=\w)", re.IGNORECASE)
+STYLES = ("display", "unit", "abbreviated", "tag")
+MESSY_VALUES = ("N/A", "-", "", "YES", "err", "#REF!")
+
+
+@dataclass(frozen=True)
+class WorkbookSpec:
+    rows: int = 1000  # data rows per sheet
+    columns: int = 10  # including the leading date column
+    sheets: int = 1
+    title_rows: int = 0  # title / metadata rows above the header row
+    messy_ratio: float = 0.0  # share of values written as text: thousands separators, %, units, placeholders
+    asset_suffixes: bool = False  # "Coal Consumption AFBC-1" instead of "Coal Consumption"
+    seed: int = 7
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _header(index: int, parameter: dict, asset: dict | None, style: str) -> str:
+    name = parameter["display_name"]
+    if style == "tag":
+        name = f"DCS-{101 + index}"
+    elif style == "unit" and parameter.get("unit"):
+        name = f"{name} ({parameter['unit']})"
+    elif style == "abbreviated":
+        name = " ".join(_INNER_VOWELS.sub("", w) if len(w) > 4 else w for w in name.split()).upper()
+    return f"{name} {asset['name']}" if asset is not None else name
+
+
+def _columns(spec: WorkbookSpec) -> list[tuple[int, dict, dict | None]]:
+    """(registry index, parameter, asset) per value column; past the last one, columns are unmapped."""
+    registry = get_registry()
+    assets = {a["name"]: a for a in registry.assets}
+    pairs = []
+    for i, p in enumerate(registry.parameters):
+        applicable = [assets[a] for a in p.get("applicable_assets", []) if a in assets]
+        if spec.asset_suffixes and applicable:
+            pairs.extend((i, p, a) for a in applicable)
+        else:
+            pairs.append((i, p, None))
+    return pairs
+
+
+def header_catalogue() -> dict[str, tuple[str, str | None]]:
+    """Normalized header → (parameter, asset) for every header the generator can write."""
+    registry = get_registry()
+    catalogue = {}
+    for i, p in enumerate(registry.parameters):
+        for asset in [None] + [a for a in registry.assets if a["name"] in p.get("applicable_assets", [])]:
+            for style in STYLES:
+                catalogue[normalize_header(_header(i, p, asset, style))] = (p["name"], asset["name"] if asset else None)
+    return catalogue
+
+
+def _messy(rng: random.Random, value: float, unit: str) -> str:
+    kind = rng.randrange(4)
+    if kind == 0:
+        return f"{value:,.2f}"
+    if kind == 1:
+        return f"{value:.1f}%"
+    if kind == 2 and unit:
+        return f"{value:.2f} {unit}"
+    return rng.choice(MESSY_VALUES)
+
+
+def synthetic_workbook(spec: WorkbookSpec) -> bytes:
+    rng = random.Random(spec.seed)
+    pairs = _columns(spec)
+    value_columns = spec.columns - 1
+    headers = ["Date"] + [
+        _header(*pairs[c], rng.choice(STYLES)) if c < len(pairs) else f"Spare {c - len(pairs) + 1}"
+        for c in range(value_columns)
+    ]
+    units = [pairs[c][1].get("unit", "") if c < len(pairs) else "" for c in range(value_columns)]
+    scales = [rng.uniform(10, 5000) for _ in range(value_columns)]
+    start = datetime(2024, 1, 1)
+
+    wb = openpyxl.Workbook(write_only=True)
+    for s in range(spec.sheets):
+        ws = wb.create_sheet(f"Sheet {s + 1}")
+        for t in range(spec.title_rows):
+            ws.append(["PLANT OPERATIONS LOG"] if t == 0 else [f"Period: {start:%B %Y}", None, "Confidential"])
+        ws.append(headers)
+        for i in range(spec.rows):
+            row = [start + timedelta(hours=s * spec.rows + i)]
+            for c in range(value_columns):
+                value = round(scales[c] * rng.uniform(0.8, 1.2), 2)
+                row.append(_messy(rng, value, units[c]) if rng.random() < spec.messy_ratio else value)
+            ws.append(row)
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def with_shared_strings(data: bytes) -> bytes:
+    """The same workbook with its inline strings moved to xl/sharedStrings.xml."""
+    table: dict[bytes, int] = {}
+
+    def shared(m: re.Match) -> bytes:
+        idx = table.setdefault(m.group(3), len(table))
+        return b'<c r="%s"%s t="s"><v>%d</v></c>' % (m.group(1), m.group(2), idx)
+
+    src, out = zipfile.ZipFile(io.BytesIO(data)), io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        for name in src.namelist():
+            part = src.read(name)
+            if name.startswith("xl/worksheets/"):
+                part = _INLINE_CELL.sub(shared, part)
+            elif name == "[Content_Types].xml":
+                part = part.replace(b"</Types>", b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+                                    b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>')
+            z.writestr(name, part)
+        z.writestr("xl/sharedStrings.xml", b'<?xml version="1.0" encoding="UTF-8"?><sst xmlns="http://schemas.openxml'
+                   b'formats.org/spreadsheetml/2006/main">' + b"".join(b"<si><t>%s</t></si>" % t for t in table) + b"</sst>")
+    return out.getvalue()
@@ -0,0 +1,57 @@
+"""
+Benchmark: direct XLSX reader vs openpyxl read-only mode, values only.
+Reads every sheet of each workbook with both readers, checks they yield the same rows and
+reports the best time of --repeat runs. Without file arguments it generates a synthetic
+plant log and times it twice: as openpyxl writes it (inline strings) and with its text in
+a shared-string table, which is how Excel itself saves workbooks.
+
+    cd backend && python -m benchmarks.xlsx_reader [--rows 50000] [files...]
+"""
+import argparse
+import io
+import time
+from pathlib import Path
+
+from app.utils.workbook_readers import FastXlsxReader, XlsxReader
+from benchmarks.workbooks import WorkbookSpec, synthetic_workbook, with_shared_strings
+
+
+def read_all(reader_cls, data: bytes) -> tuple[float, list]:
+    start = time.perf_counter()
+    reader = reader_cls(io.BytesIO(data), "bench.xlsx")
+    sheets = [list(reader.rows(name)) for name in reader.sheetnames]
+    reader.close()
+    return time.perf_counter() - start, sheets
+
+
+def bench(label: str, data: bytes, repeat: int) -> None:
+    (slow, expected), (fast, got) = read_all(XlsxReader, data), read_all(FastXlsxReader, data)
+    if [[tuple(r) for r in s] for s in got] != [[tuple(r) for r in s] for s in expected]:
+        raise SystemExit(f"{label}: readers disagree")
+    for _ in range(repeat - 1):
+        slow = min(slow, read_all(XlsxReader, data)[0])
+        fast = min(fast, read_all(FastXlsxReader, data)[0])
+    cells = sum(len(r) for s in expected for r in s)
+    print(f"{label:<32} {cells:>10,} {slow:>9.3f} {fast:>9.3f} {cells / fast:>12,.0f} {slow / fast:>7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--rows", type=int, default=50_000, help="data rows per synthetic sheet")
+    parser.add_argument("--sheets", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'workbook':<32} {'cells':>10} {'openpyxl':>9} {'direct':>9} {'cells/s':>12} {'speedup':>8}")
+    if args.files:
+        for path in args.files:
+            bench(path.name, path.read_bytes(), args.repeat)
+        return
+    data = synthetic_workbook(WorkbookSpec(rows=args.rows, sheets=args.sheets, messy_ratio=0.1))
+    bench("synthetic, inline strings", data, args.repeat)
+    bench("synthetic, shared strings", with_shared_strings(data), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -179,7 +179,7 @@ with st.sidebar:
 
     st.markdown("<p style='color:#2d9e6b; font-size:11px; font-weight:700; text-transform:uppercase; letter-spacing:2px;'>How It Works</p>", unsafe_allow_html=True)
     steps = [
-        ("01", "Upload factory .xlsx file"),
+        ("01", "Upload factory .xlsx / .csv / .ods file"),
         ("02", "AI detects headers & assets"),
         ("03", "Parameters mapped via Gemini"),
         ("04", "Values parsed & validated"),
@@ -212,7 +212,7 @@ col1, col2 = st.columns([3, 2])
 
 with col1:
     st.markdown("<div class='section-header'>Upload Data File</div>", unsafe_allow_html=True)
-    uploaded = st.file_uploader("", type=["xlsx"], label_visibility="collapsed")
+    uploaded = st.file_uploader("", type=["xlsx", "csv", "tsv", "ods", "xls"], label_visibility="collapsed")
     if uploaded:
         st.success(f"✅ Ready: **{uploaded.name}** ({uploaded.size / 1024:.1f} KB)")
 
@@ -240,7 +240,7 @@ if uploaded and st.button("🚀 Parse with AI", type="primary", use_container_wi
                     "file": (
                         uploaded.name,
                         uploaded.getvalue(),
-                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        uploaded.type or "application/octet-stream",
                     )
                 },
                 timeout=60.0,
@@ -318,7 +318,7 @@ if uploaded and st.button("🚀 Parse with AI", type="primary", use_container_wi
                 st.download_button(
                     label="⬇️ Download Clean JSON",
                     data=json.dumps(result, indent=2),
-                    file_name=f"{uploaded.name.replace('.xlsx','')}_parsed.json",
+                    file_name=f"{uploaded.name.rsplit('.', 1)[0]}_parsed.json",
                     mime="application/json",
                     use_container_width=True,
                 )
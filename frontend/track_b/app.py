@@ -132,9 +132,17 @@ elif step == 3:
     st.markdown("## 📋 Step 3: Parameters")
 
     try:
-        response = httpx.get(f"{API_BASE}/api/track-b/parameters", timeout=10)
-        response.raise_for_status()
-        params = response.json()
+        # Revalidate the copy kept from the previous rerun; an unchanged registry answers 304 with no body
+        cached = st.session_state.get("registry_cache")
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        response = httpx.get(f"{API_BASE}/api/track-b/parameters", headers=headers, timeout=10)
+        if response.status_code == 304 and cached:
+            params = cached["params"]
+        else:
+            response.raise_for_status()
+            params = response.json()
+            if response.headers.get("etag"):
+                st.session_state.registry_cache = {"etag": response.headers["etag"], "params": params}
     except Exception:
         st.error("Backend not running.")
         st.stop()